@@ -0,0 +1,177 @@
+"""Adds and removes roles for many members at once.
+
+Bulk role changes, such as copying one role's members to another, are
+staged and then applied together as jobs in the job queue, which runs
+a bounded number of them at once. Members who already have (or don't
+have) the role are skipped without a request being made. Progress can
+be reported while the changes are applied, such as to the response of
+the slash command that started them.
+"""
+
+import time
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+from typing import NamedTuple
+
+import discord
+
+from jobs import JobQueue
+from scheduler import Priority, Route, Scheduler
+
+# The number of seconds between progress reports.
+_PROGRESS_INTERVAL = 5
+
+
+class BulkResult(NamedTuple):
+    """The outcome of applying bulk role changes.
+
+    Attributes:
+        changed: The number of changes that were made.
+        skipped: The number of changes that weren't needed.
+        failed: The number of changes that couldn't be made.
+        seconds: The number of seconds it took to apply the changes.
+    """
+
+    changed: int
+    skipped: int
+    failed: int
+    seconds: float
+
+    @property
+    def rate(self) -> float:
+        """The number of changes made per second."""
+
+        return self.changed / self.seconds if self.seconds else 0.0
+
+
+def interaction_progress(
+    interaction: discord.Interaction,
+    action: str
+) -> Callable[[int, int], Awaitable[None]]:
+    """Returns a function that reports progress in a deferred response.
+
+    Args:
+        interaction: The interaction whose response is edited.
+        action: A description of what is being done.
+    """
+
+    scheduler = Scheduler()
+
+    async def progress(done: int, total: int) -> None:
+        try:
+            await scheduler.submit(
+                Route.MESSAGE,
+                interaction.channel_id,
+                interaction.edit_original_response(
+                    content=f'{action}... {done}/{total}'
+                ),
+                Priority.INTERACTIVE
+            )
+        except discord.HTTPException:
+            # Progress is only informative, so a failed
+            # report shouldn't stop the changes.
+            pass
+
+    return progress
+
+
+class BulkRoleEditor:
+    """Stages role changes for many members and applies them together.
+
+    Args:
+        progress: A function that is periodically called with the number
+            of changes that have finished and the total number of changes
+            while they are being applied.
+    """
+
+    def __init__(
+        self,
+        progress: Callable[[int, int], Awaitable[None]] | None = None
+    ) -> None:
+        self._jobs = JobQueue()
+        self._progress = progress
+        self._staged = []
+        self._skipped = 0
+
+    def add(
+        self,
+        members: Iterable[discord.Member],
+        role: discord.Role
+    ) -> None:
+        """Stages adding a role to members who don't already have it.
+
+        Args:
+            members: The members to add the role to.
+            role: The role to add.
+        """
+
+        for member in members:
+            if member.get_role(role.id) is None:
+                self._staged.append(
+                    ('add-role', {'member': member.id, 'role': role.id})
+                )
+            else:
+                self._skipped += 1
+
+    def remove(
+        self,
+        members: Iterable[discord.Member],
+        role: discord.Role
+    ) -> None:
+        """Stages removing a role from members who have it.
+
+        Args:
+            members: The members to remove the role from.
+            role: The role to remove.
+        """
+
+        for member in members:
+            if member.get_role(role.id) is not None:
+                self._staged.append(
+                    ('remove-role', {'member': member.id, 'role': role.id})
+                )
+            else:
+                self._skipped += 1
+
+    async def apply(self) -> BulkResult:
+        """Applies the staged changes and waits for them to finish.
+
+        Returns:
+            The outcome of the changes.
+        """
+
+        start = time.monotonic()
+        staged, self._staged = self._staged, []
+        skipped, self._skipped = self._skipped, 0
+
+        done = 0
+
+        def on_finish(_: bool) -> None:
+            nonlocal done
+            done += 1
+
+        # Report progress periodically until all the changes have finished.
+        waiting = asyncio.create_task(
+            self._jobs.wait(self._jobs.enqueue(staged), on_finish)
+        )
+        reported = 0
+        while True:
+            finished, _ = await asyncio.wait(
+                {waiting},
+                timeout=_PROGRESS_INTERVAL
+            )
+            if finished:
+                break
+
+            if self._progress is not None and done != reported:
+                reported = done
+                await self._progress(done, len(staged))
+
+        failed = waiting.result()
+
+        return BulkResult(
+            len(staged) - failed,
+            skipped,
+            failed,
+            time.monotonic() - start
+        )
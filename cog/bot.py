@@ -6,10 +6,15 @@ command tree when the bot is ready.
 
 from discord.ext import commands
 
+from data import Data
+from jobs import JobQueue
+from logsink import LogSink
+
 
 # The list of cogs to load.
 _COGS = ('channel.management',
          'channel.assignment',
+         'member_index',
          'misc',
          'ticket.ticket_controller')
 
@@ -24,14 +29,31 @@ class Bot(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self._bot = bot
 
+    async def cog_unload(self) -> None:
+        """Stops the job queue and the log sink when the bot shuts down.
+
+        Unfinished jobs are kept and resumed when the bot next starts.
+        """
+
+        await JobQueue().stop()
+        await LogSink().stop()
+
     @commands.Cog.listener()
     async def on_ready(self) -> None:
         """Sets up the bot when it is ready to do so."""
 
+        # Send log entries to the log channel.
+        LogSink().start(self._bot.get_channel(Data().log_channel_id))
+
         # Load all other cogs after the bot is ready.
         for cog in _COGS:
             await self._bot.load_extension(f'cog.{cog}')
 
+        # Start working through queued jobs, including any left
+        # unfinished from before the bot last stopped. This is done
+        # after loading the cogs since they register the job handlers.
+        JobQueue().start()
+
         # Sync the command tree to all guilds.
         await self._bot.tree.sync()
 
@@ -0,0 +1,344 @@
+"""Keeps track of the bot's anchor message in each game thread.
+
+When a game thread is created, the bot sends a message to it that
+is later edited with mentions to silently add members to the thread.
+This message is called the thread's anchor. The registry here maps
+each thread to its anchor so that the anchor can be edited directly,
+rather than being found by paging through the thread's history.
+
+Every edit of an anchor goes through the registry, which makes the
+edits of each anchor one at a time and skips edits that wouldn't change
+it. Since each edit sets the whole content of the message from the
+anchor's original content, overlapping edits can never leave mentions
+behind in the message.
+"""
+
+import weakref
+import asyncio
+from typing import NamedTuple
+
+import discord
+
+from data import Data, Singleton, MISC_GAMES_CHANNEL_NAME
+from scheduler import Priority, Route, Scheduler
+
+# The namespace of the bot's persistent state that anchors are stored in.
+_NAMESPACE = 'anchor'
+
+
+class Anchor(NamedTuple):
+    """The anchor message of a game thread.
+
+    Attributes:
+        message_id: The ID of the anchor message.
+        content: The original content of the anchor message.
+        first_message_id: The ID of the first message in the thread,
+            or None if it isn't known yet.
+    """
+
+    message_id: int
+    content: str
+    first_message_id: int | None
+
+
+def anchor_content(channel_name: str) -> str:
+    """Returns the original content of an anchor message.
+
+    Args:
+        channel_name: The name of the game channel the thread is in.
+    """
+
+    return (
+        f'Registered this thread with '
+        f'\'{channel_name.replace("-", " ").upper()}\'!'
+    )
+
+
+class AnchorRegistry(metaclass=Singleton):
+    """Maps game threads to their anchor messages.
+
+    The registry is persisted in the bot's state so that it survives
+    restarts. Threads that were created before the registry existed
+    are added to it the first time their anchor is needed.
+
+    While a new thread's anchor is still being posted, requests for it
+    wait until it is registered rather than looking through the
+    thread's history before the anchor exists.
+    """
+
+    def __init__(self) -> None:
+        self._data = Data()
+        self._anchors = {
+            int(thread_id): Anchor(
+                values['message'],
+                values['content'],
+                values['first']
+            )
+            for thread_id, values in self._data.state(_NAMESPACE).items()
+        }
+        self._backfills = {}
+        self._expected = {}
+        self._scheduler = Scheduler()
+
+        # The lock that each anchor's edits are made under,
+        # and the content each anchor was last edited to.
+        self._locks = weakref.WeakValueDictionary()
+        self._contents = {}
+
+    def _store(self, thread_id: int, anchor: Anchor) -> None:
+        """Stores the anchor of a thread in memory and in the bot's state.
+
+        Args:
+            thread_id: The ID of the thread.
+            anchor: The thread's anchor.
+        """
+
+        self._anchors[thread_id] = anchor
+        self._data.set_state(_NAMESPACE, thread_id, {
+            'message': anchor.message_id,
+            'content': anchor.content,
+            'first': anchor.first_message_id,
+        })
+
+    def register(
+        self,
+        thread: discord.Thread,
+        message: discord.Message
+    ) -> Anchor:
+        """Registers a message sent by the bot as a thread's anchor.
+
+        Args:
+            thread: The thread the message was sent in.
+            message: The anchor message.
+
+        Returns:
+            The thread's anchor.
+        """
+
+        # The anchor is the first message in all game threads
+        # except for 'Miscellaneous Games' threads, where it is
+        # the second message after the one sent by the author.
+        is_misc = thread.parent.name == MISC_GAMES_CHANNEL_NAME
+        anchor = Anchor(
+            message.id,
+            message.content,
+            None if is_misc else message.id
+        )
+        self._store(thread.id, anchor)
+
+        expected = self._expected.pop(thread.id, None)
+        if expected is not None and not expected.done():
+            expected.set_result(anchor)
+
+        return anchor
+
+    def expect(self, thread_id: int) -> None:
+        """Marks a thread as having its anchor about to be posted.
+
+        Requests for the thread's anchor wait until it is
+        registered or the thread stops being expected.
+
+        Args:
+            thread_id: The ID of the thread.
+        """
+
+        if thread_id not in self._expected:
+            self._expected[thread_id] = (
+                asyncio.get_running_loop().create_future()
+            )
+
+    def unexpect(self, thread_id: int) -> None:
+        """Stops waiting for a thread's anchor to be posted.
+
+        Requests that were waiting for the anchor fall back
+        to finding it from the thread's history.
+
+        Args:
+            thread_id: The ID of the thread.
+        """
+
+        expected = self._expected.pop(thread_id, None)
+        if expected is not None and not expected.done():
+            expected.set_result(None)
+
+    def forget(self, thread_id: int) -> None:
+        """Removes a thread from the registry if it exists.
+
+        Args:
+            thread_id: The ID of the thread.
+        """
+
+        anchor = self._anchors.pop(thread_id, None)
+        if anchor is not None:
+            self._data.delete_state(_NAMESPACE, thread_id)
+            self._contents.pop(anchor.message_id, None)
+
+    async def get(self, thread: discord.Thread) -> Anchor:
+        """Returns the anchor of a thread.
+
+        If the thread isn't in the registry yet, then its
+        anchor is found from its history and registered.
+
+        Args:
+            thread: The thread to get the anchor of.
+        """
+
+        anchor = self._anchors.get(thread.id)
+        if anchor is not None:
+            return anchor
+
+        # If the anchor is about to be posted, wait for it instead.
+        expected = self._expected.get(thread.id)
+        if expected is not None:
+            anchor = await asyncio.shield(expected)
+            if anchor is not None:
+                return anchor
+
+        # Share a single history lookup between
+        # concurrent requests for the same thread.
+        task = self._backfills.get(thread.id)
+        if task is None:
+            task = asyncio.create_task(self._backfill(thread))
+            self._backfills[thread.id] = task
+            task.add_done_callback(
+                lambda _: self._backfills.pop(thread.id, None)
+            )
+
+        return await asyncio.shield(task)
+
+    async def first_message_id(self, thread: discord.Thread) -> int:
+        """Returns the ID of the first message in a thread.
+
+        Args:
+            thread: The thread to get the first message ID of.
+        """
+
+        anchor = await self.get(thread)
+        if anchor.first_message_id is not None:
+            return anchor.first_message_id
+
+        first_msg = [
+            msg async for msg in thread.history(limit=1, oldest_first=True)
+        ][0]
+        self._store(thread.id, anchor._replace(first_message_id=first_msg.id))
+
+        return first_msg.id
+
+    async def edit(
+        self,
+        thread: discord.Thread,
+        anchor: Anchor,
+        content: str,
+        priority: Priority = Priority.INTERACTIVE
+    ) -> None:
+        """Edits a thread's anchor message.
+
+        Edits of the same anchor are made one at a time in the order
+        they were requested. An edit is skipped if the anchor was last
+        edited to the same content.
+
+        Args:
+            thread: The thread the anchor is in.
+            anchor: The thread's anchor.
+            content: The new content of the anchor message.
+            priority: The priority of the edit.
+        """
+
+        async with self._lock(anchor.message_id):
+            if self._contents.get(anchor.message_id) != content:
+                await self._write(thread, anchor, content, priority)
+
+    async def repair(
+        self,
+        thread: discord.Thread,
+        anchor: Anchor,
+        priority: Priority = Priority.INTERACTIVE
+    ) -> bool:
+        """Restores a thread's anchor message if it has been changed.
+
+        Args:
+            thread: The thread the anchor is in.
+            anchor: The thread's anchor.
+            priority: The priority of the edit.
+
+        Returns:
+            Whether the anchor had to be restored.
+        """
+
+        async with self._lock(anchor.message_id):
+            message = await thread.fetch_message(anchor.message_id)
+            self._contents[anchor.message_id] = message.content
+            if message.content == anchor.content:
+                return False
+
+            await self._write(thread, anchor, anchor.content, priority)
+
+            return True
+
+    async def _write(
+        self,
+        thread: discord.Thread,
+        anchor: Anchor,
+        content: str,
+        priority: Priority
+    ) -> None:
+        """Edits an anchor message while holding the anchor's lock.
+
+        Args:
+            thread: The thread the anchor is in.
+            anchor: The thread's anchor.
+            content: The new content of the anchor message.
+            priority: The priority of the edit.
+        """
+
+        # The content isn't known if the edit fails part way.
+        self._contents.pop(anchor.message_id, None)
+        await self._scheduler.submit(
+            Route.MESSAGE,
+            thread.id,
+            thread.get_partial_message(anchor.message_id).edit(
+                content=content
+            ),
+            priority
+        )
+        self._contents[anchor.message_id] = content
+
+    def _lock(self, message_id: int) -> asyncio.Lock:
+        """Returns the lock that an anchor's edits are made under.
+
+        The lock only exists while it is in use.
+
+        Args:
+            message_id: The ID of the anchor message.
+        """
+
+        lock = self._locks.get(message_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[message_id] = lock
+
+        return lock
+
+    async def _backfill(self, thread: discord.Thread) -> Anchor:
+        """Finds a thread's anchor from its history and registers it.
+
+        Args:
+            thread: The thread to find the anchor of.
+        """
+
+        is_misc = thread.parent.name == MISC_GAMES_CHANNEL_NAME
+        n = 2 if is_misc else 1
+        messages = [
+            msg async for msg in thread.history(limit=n, oldest_first=True)
+        ]
+
+        # Use the content the anchor should have rather than its current
+        # content, since the current content may be clogged with mentions.
+        anchor = Anchor(
+            messages[n - 1].id,
+            anchor_content(thread.parent.name),
+            messages[0].id
+        )
+        self._store(thread.id, anchor)
+
+        return anchor
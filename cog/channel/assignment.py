@@ -5,25 +5,41 @@ provided access to all the relevant threads for that
 role's game. This functionality is provided here.
 """
 
+import asyncio
+from contextlib import asynccontextmanager
+
 import discord
 from discord import app_commands
 from discord.ext import commands
 
-from collections import defaultdict as dd
-from collections.abc import Iterable
+from collections.abc import AsyncIterator, Iterable
 
+from bulk import interaction_progress
 from data import Data, MISC_GAMES_CHANNEL_NAME
-from util import get_nth_msg
+from jobs import JobQueue
+from logsink import LogSink
+from scheduler import Priority, Route, Scheduler
+from cog.channel.anchor import Anchor, AnchorRegistry, anchor_content
+from cog.channel.batcher import MentionBatcher, split_mentions
+from cog.channel.partition import PartitionRolePool
+
+# The namespace of the bot's persistent state that the members who
+# had reacted to each 'Miscellaneous Games' thread at the last sync
+# are stored in.
+_REACTER_NAMESPACE = 'misc-reacter'
 
-# The maximum number of members that can be in a role for a
-# role mention in a thread to add them all to the thread.
-_MAX_ROLE_SIZE_FOR_THREAD_JOIN = 99
+# The default maximum number of thread operations that
+# can be in progress at once when adding members to threads.
+_THREAD_JOIN_CONCURRENCY = 5
 
-# The order to add members to threads in a gaming channel.
-_THREAD_ADD_ORDER = (1, 2, 3)
+# The number of seconds to wait for further game roles to be
+# given to a member before adding them to the roles' threads.
+_MEMBER_UPDATE_DEBOUNCE = 2
 
-# A flag to disable the on_member_update event.
-_disable_member_update = False
+# The number of seconds to keep suppressing a member's updates after a
+# suppression scope ends, since the update events for roles given inside
+# the scope can arrive slightly after the requests that gave them finish.
+_SUPPRESSION_GRACE = 2
 
 
 class ChannelAssignment(commands.Cog):
@@ -37,25 +53,157 @@ class ChannelAssignment(commands.Cog):
         self._bot = bot
         self._guild = bot.guilds[0]
         self._data = Data()
+        self._anchors = AnchorRegistry()
+        self._scheduler = Scheduler()
+        self._log = LogSink()
+        self._management = bot.get_cog('ChannelManagement')
+        self._batcher = MentionBatcher(self._anchors.edit)
+
+        # The game roles recently given to each member that they haven't
+        # been added to the threads of yet, and the tasks that will add them.
+        self._pending_role_ids = {}
+        self._pending_joins = {}
+
+        # The number of active suppression scopes for each member whose
+        # on_member_update events are suppressed, and the game roles given
+        # to them while suppressed.
+        self._suppressed = {}
+        self._deferred_role_ids = {}
+
+        # Register the handlers for the jobs that bulk operations
+        # are split into.
+        self._jobs = JobQueue()
+        self._jobs.register('thread-join', self._thread_join_job)
+        self._jobs.register('add-role', self._add_role_job)
+        self._jobs.register('remove-role', self._remove_role_job)
+        self._partitions = PartitionRolePool(self._guild)
+
+    async def _thread_join_job(self, payload: dict) -> None:
+        """Runs a job that adds member(s) to a thread.
 
-    @staticmethod
-    def _kebab(str_: str) -> str:
-        """Converts a string to kebab case.
+        Args:
+            payload: The ID of the thread and the mention
+                string to use to add the members.
+        """
+
+        # The thread may have been deleted since the job was queued.
+        thread = self._guild.get_thread(payload['thread'])
+        if thread is None:
+            return
+
+        await self._add_member_to_threads(
+            payload['mention'],
+            (thread,),
+            priority=Priority.BULK
+        )
+
+    async def _add_role_job(self, payload: dict) -> None:
+        """Runs a job that adds a role to a member.
 
         Args:
-            str_: The string to convert.
+            payload: The IDs of the member and the role.
+        """
+
+        # The member may have left or the role may have
+        # been deleted since the job was queued.
+        member = self._guild.get_member(payload['member'])
+        role = self._guild.get_role(payload['role'])
+        if member is None or role is None:
+            return
+
+        await self._scheduler.submit(
+            Route.MEMBER_ROLE,
+            self._guild.id,
+            member.add_roles(role),
+            Priority.BULK
+        )
+
+    async def _remove_role_job(self, payload: dict) -> None:
+        """Runs a job that removes a role from a member.
+
+        Args:
+            payload: The IDs of the member and the role.
+        """
+
+        # The member may have left or the role may have
+        # been deleted since the job was queued.
+        member = self._guild.get_member(payload['member'])
+        role = self._guild.get_role(payload['role'])
+        if member is None or role is None:
+            return
+
+        await self._scheduler.submit(
+            Route.MEMBER_ROLE,
+            self._guild.id,
+            member.remove_roles(role),
+            Priority.BULK
+        )
+
+    async def _fetch_thread_member_ids(
+        self,
+        threads: Iterable[discord.Thread]
+    ) -> dict[int, set[int]]:
+        """Fetches the IDs of the members already in each thread.
+
+        Args:
+            threads: The threads to fetch the members of.
 
         Returns:
-            The given string in kebab case.
+            A mapping of thread IDs to the IDs of their members.
         """
 
-        return str_.replace(' ', '-').lower()
+        semaphore = asyncio.Semaphore(_THREAD_JOIN_CONCURRENCY)
+
+        async def fetch(thread: discord.Thread) -> set[int]:
+            async with semaphore:
+                return {member.id for member in await thread.fetch_members()}
+
+        threads = list(threads)
+        member_ids = await asyncio.gather(
+            *(fetch(thread) for thread in threads)
+        )
+
+        return {
+            thread.id: ids for thread, ids in zip(threads, member_ids)
+        }
+
+    def _thread_join_jobs(
+        self,
+        thread: discord.Thread,
+        member_ids: Iterable[int],
+        chain: str
+    ) -> list[tuple[str, dict, str]]:
+        """Creates the jobs that add members to a thread by mentioning them.
+
+        The members are mentioned in as few edits as possible.
+
+        Args:
+            thread: The thread to add the members to.
+            member_ids: The IDs of the members to add.
+            chain: The chain the jobs belong to.
+
+        Returns:
+            The jobs to add to the job queue.
+        """
+
+        mentions = [f'<@{id_}>' for id_ in sorted(member_ids)]
+        return [
+            ('thread-join',
+             {'thread': thread.id, 'mention': ' '.join(chunk)},
+             chain)
+            for chunk in split_mentions(
+                mentions,
+                anchor_content(thread.parent.name)
+            )
+        ]
 
-    @staticmethod
     async def _add_member_to_threads(
+        self,
         mention: str,
         threads: Iterable[discord.Thread],
-        misc_games: bool = False
+        concurrency: int = _THREAD_JOIN_CONCURRENCY,
+        batched: bool = False,
+        priority: Priority = Priority.INTERACTIVE
     ) -> None:
         """Adds member(s) to a list of threads.
 
@@ -64,28 +212,16 @@ class ChannelAssignment(commands.Cog):
 
         Args:
             mention: The mention string to use to add the members.
-            threads: The threads to be added to.
-            misc_games: Whether the threads are 'Miscellaneous Games' threads.
+            threads: The threads to be added to, in the order
+                that the member(s) should be added to them.
+            concurrency: The maximum number of thread operations
+                that can be in progress at once.
+            batched: Whether to gather the mention with others for the
+                same threads so that they are added with fewer edits.
+            priority: The priority of the edits.
         """
         threads = list(threads)
 
-        # If any of the threads is a 'Patch Notes' thread, then correct the thread order.
-        # We correct the thread order because of the 'Patch Bot Incident', where a failure
-        # to continue paying for Patch Bot resulted in deleted settings and a messed up thread order.
-        patch_notes_thread_marker_list = ['Patch Notes' in thread.name for thread in threads]
-        while True in patch_notes_thread_marker_list:
-            patch_notes_thread_index = patch_notes_thread_marker_list.index(True)
-            threads.insert(0, threads.pop(patch_notes_thread_index))
-
-            patch_notes_thread_marker_list.pop(patch_notes_thread_index)
-            patch_notes_thread_marker_list.insert(0, False)
-
-        # Since threads are added to the top of the thread list for
-        # their associated channel rather than the bottom, we must reverse
-        # the order of the thread list to maintain the order of thread
-        # creation in the channel list.
-        threads.reverse()
-
         # Add the member to each thread. It's worth noting that
         # we use a special technique here. We don't use the
         # discord.Thread.add_user method as this sends a system
@@ -98,19 +234,83 @@ class ChannelAssignment(commands.Cog):
         # then edit it again to remove the mention. This adds
         # the member to the thread, does not give them a ghost
         # ping and does not send a notification.
-        for thread in threads:
-            # Get the message sent by the bot at the thread's creation.
-            # This is the second message ever sent in the thread for
-            # 'Miscellaneous Games' threads and the first message ever
-            # sent for all other game threads.
-            bot_message = await get_nth_msg(thread, 2 if misc_games else 1)
-
-            # Edit the bot's message with the mention, and then
-            # immediately edit it again to remove the mention.
-            old_content = bot_message.content
-            new_content = old_content + f' [Adding {mention}...]'
-            await bot_message.edit(content=new_content)
-            await bot_message.edit(content=old_content)
+        #
+        # The order that threads appear in for a member is the order
+        # that they were added to them, so the edits that add the
+        # mention are made one at a time in order. Everything else,
+        # which is looking up the anchors and removing the mentions,
+        # happens concurrently.
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def get_anchor(thread: discord.Thread) -> Anchor:
+            async with semaphore:
+                return await self._anchors.get(thread)
+
+        async def restore_anchor(
+            thread: discord.Thread,
+            anchor: Anchor
+        ) -> None:
+            async with semaphore:
+                await self._anchors.edit(
+                    thread,
+                    anchor,
+                    anchor.content,
+                    priority
+                )
+
+        anchors = await asyncio.gather(
+            *(get_anchor(thread) for thread in threads)
+        )
+
+        # If batching, then the batcher makes the edits and restores
+        # the anchors once the mention has been added. Every thread is
+        # queued as soon as there is room so that their batch windows
+        # overlap, but the mention is only added to each thread once
+        # it has been added to the one before it, which keeps the order.
+        # A failure in one thread doesn't stop the member being added
+        # to the rest.
+        if batched:
+            async def add_mention(
+                thread: discord.Thread,
+                anchor: Anchor,
+                after: asyncio.Task | None
+            ) -> None:
+                async with semaphore:
+                    await self._batcher.add(thread, anchor, mention, after)
+
+            additions = []
+            for thread, anchor in zip(threads, anchors):
+                additions.append(asyncio.create_task(add_mention(
+                    thread,
+                    anchor,
+                    additions[-1] if additions else None
+                )))
+
+            results = await asyncio.gather(
+                *additions,
+                return_exceptions=True
+            )
+            for thread, result in zip(threads, results):
+                if isinstance(result, Exception):
+                    self._log.log(
+                        f'Failed to add {mention} to the '
+                        f'\'{thread.name}\' thread: {result}'
+                    )
+            return
+
+        restores = []
+        try:
+            for thread, anchor in zip(threads, anchors):
+                # Edit the bot's message with the mention, and then
+                # edit it again to restore its original content.
+                new_content = anchor.content + f' [Adding {mention}...]'
+                await self._anchors.edit(thread, anchor, new_content, priority)
+                restores.append(
+                    asyncio.create_task(restore_anchor(thread, anchor))
+                )
+        finally:
+            # Always restore the anchors that were edited.
+            await asyncio.gather(*restores)
 
     @commands.Cog.listener()
     async def on_member_update(
@@ -129,36 +329,159 @@ class ChannelAssignment(commands.Cog):
             after: The member object after it was updated.
         """
 
-        # Exit immediately if this event has been flagged as disabled.
-        if _disable_member_update:
-            return
-
         # Determine the IDs of the roles that were added to the member, if any.
-        game_role_ids = set(self._data.role_ids())
+        game_role_ids = self._data.role_ids()
         before_role_ids = set(role.id for role in before.roles)
-        after_role_ids = set(role.id for role in after.roles)
-        before_game_role_ids = game_role_ids.intersection(before_role_ids)
-        after_game_role_ids = game_role_ids.intersection(after_role_ids)
-        added_role_ids = list(after_game_role_ids - before_game_role_ids)
-
-        for id_ in added_role_ids:
-            # Get the channel name associated with the added role's game.
-            role = self._guild.get_role(id_)
-            channel_name = self._kebab(role.name)
-
-            # If the associated channel is 'Miscellaneous Games', then skip
-            # it since each thread in this channel is a game of its own and
-            # we want members to be able to manually join the miscellaneous
-            # games they play rather than being added to all of them.
-            if channel_name == MISC_GAMES_CHANNEL_NAME:
-                continue
+        added_role_ids = [
+            role.id for role in after.roles
+            if role.id in game_role_ids and role.id not in before_role_ids
+        ]
+
+        # If the associated channel is 'Miscellaneous Games', then skip
+        # it since each thread in this channel is a game of its own and
+        # we want members to be able to manually join the miscellaneous
+        # games they play rather than being added to all of them.
+        added_role_ids = [
+            id_ for id_ in added_role_ids
+            if self._data.game(id_) != MISC_GAMES_CHANNEL_NAME
+        ]
+        if not added_role_ids:
+            return
+
+        # If the member's updates are suppressed, then defer adding
+        # them to threads until the suppression scope ends.
+        if after.id in self._suppressed:
+            self._deferred_role_ids.setdefault(after.id, set()).update(
+                added_role_ids
+            )
+            return
+
+        # Members are often given several game roles in quick succession,
+        # so gather the roles for a short time and then add the member to
+        # all of their threads at once.
+        self._pending_role_ids.setdefault(after.id, set()).update(
+            added_role_ids
+        )
+        if after.id not in self._pending_joins:
+            self._pending_joins[after.id] = asyncio.create_task(
+                self._add_member_to_game_threads(after.id)
+            )
+
+    async def _add_member_to_game_threads(self, member_id: int) -> None:
+        """Adds a member to the threads of the game roles they were given.
 
-            # Get the channel's threads for the added role's game.
-            channel_id = self._data.channel_id(channel_name)
-            channel_threads = self._guild.get_channel(channel_id).threads
+        This waits for the member to stop being given game roles first.
 
-            # Add the member to the channel's threads.
-            await self._add_member_to_threads(after.mention, channel_threads)
+        Args:
+            member_id: The ID of the member.
+        """
+
+        try:
+            await asyncio.sleep(_MEMBER_UPDATE_DEBOUNCE)
+        finally:
+            del self._pending_joins[member_id]
+            role_ids = self._pending_role_ids.pop(member_id)
+
+        # The member may have left while waiting.
+        member = self._guild.get_member(member_id)
+        if member is None:
+            return
+
+        # Add the member to the threads of the added roles' games.
+        await self._add_member_to_threads(
+            member.mention,
+            self._game_threads(role_ids),
+            batched=True
+        )
+
+    def _game_threads(self, role_ids: Iterable[int]) -> list[discord.Thread]:
+        """Returns the threads of the game channels for some game roles.
+
+        Args:
+            role_ids: The IDs of the game roles.
+        """
+
+        threads = []
+        for id_ in role_ids:
+            channel_id = self._data.game_channel_id(id_)
+            channel = self._guild.get_channel(channel_id)
+            if channel is not None:
+                threads.extend(self._management.ordered_threads(channel))
+
+        return threads
+
+    @asynccontextmanager
+    async def suppress_member_updates(
+        self,
+        member_ids: Iterable[int]
+    ) -> AsyncIterator[None]:
+        """Suppresses on_member_update events for some members.
+
+        This is used by bulk operations that give roles to many members,
+        since handling each member's update separately would rapidly lead
+        to too many operations happening at once and rate limiting. Only
+        the given members are affected. Any game roles given to them while
+        suppressed are collected, and when the scope ends the members are
+        added to those roles' threads together in as few edits as possible.
+
+        Args:
+            member_ids: The IDs of the members to suppress updates for.
+        """
+
+        member_ids = set(member_ids)
+        for id_ in member_ids:
+            self._suppressed[id_] = self._suppressed.get(id_, 0) + 1
+
+        try:
+            yield
+        finally:
+            await asyncio.sleep(_SUPPRESSION_GRACE)
+
+            # Collect the deferred roles of members that are
+            # no longer suppressed by any scope.
+            deferred = {}
+            for id_ in member_ids:
+                self._suppressed[id_] -= 1
+                if not self._suppressed[id_]:
+                    del self._suppressed[id_]
+                    role_ids = self._deferred_role_ids.pop(id_, None)
+                    if role_ids:
+                        deferred[id_] = role_ids
+
+            if deferred:
+                await self._add_deferred_members_to_threads(deferred)
+
+    async def _add_deferred_members_to_threads(
+        self,
+        deferred: dict[int, set[int]]
+    ) -> None:
+        """Adds members to the threads of game roles given while suppressed.
+
+        Args:
+            deferred: A mapping of member IDs to the IDs
+                of the game roles given to each member.
+        """
+
+        # Group the members by the threads they should be added to.
+        threads = {}
+        member_ids = {}
+        for member_id, role_ids in deferred.items():
+            for thread in self._game_threads(role_ids):
+                threads[thread.id] = thread
+                member_ids.setdefault(thread.id, set()).add(member_id)
+
+        # Queue jobs that mention the members of each thread together.
+        # The jobs are chained so they run in thread order.
+        jobs = [
+            job
+            for thread in threads.values()
+            for job in self._thread_join_jobs(
+                thread,
+                member_ids[thread.id],
+                'member-update'
+            )
+        ]
+        await self._jobs.wait(self._jobs.enqueue(jobs))
 
     @commands.Cog.listener()
     async def on_raw_reaction_add(
@@ -183,17 +506,32 @@ class ChannelAssignment(commands.Cog):
 
         # If the reaction wasn't added to the first message
         # in the thread, then ignore it.
-        first_msg = await get_nth_msg(thread, 1)
-        if event.message_id != first_msg.id:
+        first_msg_id = await self._anchors.first_message_id(thread)
+        if event.message_id != first_msg_id:
             return
 
         # Add the member who reacted to the thread.
         await self._add_member_to_threads(
             event.member.mention,
             (thread,),
-            misc_games=True
+            batched=True
         )
 
+    @commands.Cog.listener()
+    async def on_raw_thread_delete(
+        self,
+        event: discord.RawThreadDeleteEvent
+    ) -> None:
+        """Handles when a thread is deleted, even if it isn't cached.
+
+        Args:
+            event: The object that contains information about the deletion.
+        """
+
+        # Forget the reacters saved for the thread if it was a
+        # 'Miscellaneous Games' thread, since it will never be synced again.
+        self._data.delete_state(_REACTER_NAMESPACE, event.thread_id)
+
     async def _sync_threads(
         self,
         interaction: discord.Interaction,
@@ -203,52 +541,74 @@ class ChannelAssignment(commands.Cog):
         """Syncs a role with a collection of threads.
 
         Syncing means that every member in a role is added
-        to every thread in the collection.
+        to every thread in the collection. Members that are
+        already in a thread are skipped.
 
         Args:
             interaction: The interaction object for the slash command.
-            threads: The collection of threads to be added to.
+            threads: The collection of threads to be added to,
+                in the order that members should be added to them.
             role: The role that contains the members to add.
         """
         # Defer the bot's response to give time for the sync to complete.
         await interaction.response.defer(thinking=True)
 
-        # Calculate the number of role partitions required to add every member
-        # from the role into the game channel's threads. This is done because
-        # there is a maximum number of members that can be added to a thread
-        # at once. To solve this, we split the members of the role across many
-        # temporary roles and then add every member from each temporary role
-        # to the game channel's threads.
-        partitions = -(len(role.members) // -_MAX_ROLE_SIZE_FOR_THREAD_JOIN)
-
-        # Split the members into temporary roles if required.
-        roles_to_add = []
-        if partitions == 1:
-            roles_to_add.append(role)
-        else:
-            # Add members in max chunks to the temporary roles
-            # until every member from the original role has been
-            # allocated to a temporary one.
-            for i in range(partitions):
-                new_role = await self._guild.create_role(name=role.name)
-                start_index = i * _MAX_ROLE_SIZE_FOR_THREAD_JOIN
-                end_index = (i + 1) * _MAX_ROLE_SIZE_FOR_THREAD_JOIN
-                for member in role.members[start_index:end_index]:
-                    await member.add_roles(new_role)
-
-                roles_to_add.append(new_role)
-
-        # Add all members to the game channel threads.
-        for role_ in roles_to_add:
-            await self._add_member_to_threads(role_.mention, threads)
-
-            # Delete a role if it is temporary.
-            if len(roles_to_add) > 1:
-                await role_.delete()
+        # Work out which members are missing from each thread.
+        threads = list(threads)
+        member_ids = {member.id for member in role.members}
+        thread_member_ids = await self._fetch_thread_member_ids(threads)
+
+        # Queue the work as jobs so that it is resumed if the bot
+        # restarts. The jobs are chained so they run in thread order.
+        chain = f'sync:{role.id}'
+        jobs = []
+        added = 0
+        skipped = 0
+        failed = 0
+        roles_to_add = None
+        for thread in threads:
+            missing = member_ids - thread_member_ids[thread.id]
+            added += len(missing)
+            skipped += len(member_ids) - len(missing)
+            if not missing:
+                continue
+
+            # If most of the role is missing from the thread, then
+            # mention the role itself, since that takes fewer edits.
+            # The role's members are split across partition roles if
+            # required because there is a maximum number of members
+            # that can be added to a thread at once with a role mention.
+            # The partition roles are reused between syncs, so usually
+            # only a few members need to be moved between them.
+            if len(missing) > len(member_ids) // 2:
+                if roles_to_add is None:
+                    roles_to_add, failed = (
+                        await self._partitions.partition(
+                            role,
+                            interaction_progress(
+                                interaction,
+                                'Sorting members into partition roles'
+                            )
+                        )
+                    )
+
+                jobs.extend(
+                    ('thread-join',
+                     {'thread': thread.id, 'mention': role_.mention},
+                     chain)
+                    for role_ in roles_to_add
+                )
+            else:
+                jobs.extend(self._thread_join_jobs(thread, missing, chain))
+
+        failed += await self._jobs.wait(self._jobs.enqueue(jobs))
 
         # Stop deferring and report that the bot has finished.
         await interaction.followup.send(
-            f'Finished syncing {role.mention} with {[thread.mention for thread in threads]}!'
+            f'Finished syncing {role.mention} with {[thread.mention for thread in threads]}!\n\n'
+            f'Added {added} missing member(s) and skipped {skipped} '
+            f'member(s) already in the thread(s).'
+            + (f'\n\n{failed} operation(s) failed.' if failed else '')
         )
 
     @discord.app_commands.checks.has_role('Admin')
@@ -292,7 +652,11 @@ class ChannelAssignment(commands.Cog):
             await interaction.response.send_message(content='Not a text channel.', ephemeral=True)
             return
 
-        await self._sync_threads(interaction, channel.threads, role)
+        await self._sync_threads(
+            interaction,
+            self._management.ordered_threads(channel),
+            role
+        )
 
     @discord.app_commands.checks.has_role('Admin')
     @app_commands.command(name='sync-misc')
@@ -312,39 +676,99 @@ class ChannelAssignment(commands.Cog):
         # Defer the bot's response to give time for the sync to complete.
         await interaction.response.defer(thinking=True)
 
-        # A mapping of members to the threads they should be added to.
-        members_to_add = dd(lambda: set())
-
         # Get the 'Miscellaneous Games' channel.
         misc_games_channel_id = self._data.channel_id(MISC_GAMES_CHANNEL_NAME)
         misc_games_channel = self._guild.get_channel(misc_games_channel_id)
+        threads = misc_games_channel.threads
+
+        # Scan the reactions of every thread concurrently.
+        semaphore = asyncio.Semaphore(_THREAD_JOIN_CONCURRENCY)
+
+        async def scan(thread: discord.Thread) -> set[int]:
+            async with semaphore:
+                return await self._fetch_reacter_ids(thread)
+
+        reacter_ids = dict(zip(
+            (thread.id for thread in threads),
+            await asyncio.gather(*(scan(thread) for thread in threads))
+        ))
 
-        # Populate the members_to_add dictionary.
-        for thread in misc_games_channel.threads:
-            # Get the first message in the thread, since this is
-            # the message that reactions to the threads get added to.
-            first_msg = await get_nth_msg(thread, 1)
-
-            # Get all the members that reacted to the message and add
-            # them to the members_to_add dictionary.
-            for reaction in first_msg.reactions:
-                reacters = [member async for member in reaction.users()]
-                for member in reacters:
-                    members_to_add[member].add(thread)
-
-        # Add all the members to the relevant threads.
-        for member, threads in members_to_add.items():
-            await self._add_member_to_threads(
-                member.mention,
-                threads,
-                misc_games=True
+        # Only the members who have reacted since the last sync need to be
+        # processed, since everyone before them was handled by that sync.
+        new_reacter_ids = {}
+        for thread in threads:
+            snapshot = self._data.get_state(_REACTER_NAMESPACE, thread.id, [])
+            new_reacter_ids[thread.id] = reacter_ids[thread.id] - set(snapshot)
+
+        # Queue jobs to add the new reacters to each thread, skipping
+        # those that are already in it, with one chain per thread.
+        changed_threads = [
+            thread for thread in threads if new_reacter_ids[thread.id]
+        ]
+        thread_member_ids = await self._fetch_thread_member_ids(
+            changed_threads
+        )
+        job_ids = {}
+        added = 0
+        skipped = 0
+        for thread in changed_threads:
+            missing = new_reacter_ids[thread.id] - thread_member_ids[thread.id]
+            added += len(missing)
+            skipped += len(new_reacter_ids[thread.id]) - len(missing)
+            job_ids[thread.id] = self._jobs.enqueue(
+                self._thread_join_jobs(thread, missing, f'misc:{thread.id}')
             )
 
+        failures = dict(zip(
+            job_ids,
+            await asyncio.gather(*(
+                self._jobs.wait(ids) for ids in job_ids.values()
+            ))
+        ))
+
+        # Save the reacters of each thread that was fully synced, so
+        # that the next sync only has to process newer reacters.
+        for thread in threads:
+            if not failures.get(thread.id):
+                self._data.set_state(
+                    _REACTER_NAMESPACE,
+                    thread.id,
+                    sorted(reacter_ids[thread.id])
+                )
+
         # Stop deferring and report that the bot has finished.
+        failed = sum(failures.values())
         await interaction.followup.send(
-            f'Finished syncing \'Miscellaneous Games\' threads!'
+            f'Finished syncing \'Miscellaneous Games\' threads!\n\n'
+            f'Added {added} missing member(s) and skipped {skipped} '
+            f'member(s) already in the thread(s).'
+            + (f'\n\n{failed} operation(s) failed.' if failed else '')
         )
 
+    async def _fetch_reacter_ids(self, thread: discord.Thread) -> set[int]:
+        """Fetches the IDs of the members who reacted to a misc games thread.
+
+        Args:
+            thread: The 'Miscellaneous Games' thread.
+
+        Returns:
+            The IDs of the members who reacted to the thread's first message.
+        """
+
+        # Get the first message in the thread, since this is
+        # the message that reactions to the threads get added to.
+        first_msg_id = await self._anchors.first_message_id(thread)
+        first_msg = await thread.fetch_message(first_msg_id)
+
+        # Get all the members that reacted to the message.
+        reacter_ids = set()
+        for reaction in first_msg.reactions:
+            reacter_ids.update(
+                [member.id async for member in reaction.users()]
+            )
+
+        return reacter_ids
+
 
 async def setup(bot: commands.Bot) -> None:
     """A hook for the bot to register the ChannelAssignment cog.
@@ -355,13 +779,3 @@ async def setup(bot: commands.Bot) -> None:
 
     await bot.add_cog(ChannelAssignment(bot))
 
-
-def set_member_update_state(enabled: bool) -> None:
-    """Determines if the on_member_update event should run.
-
-    Args:
-        enabled: Whether the on_member_update event should run.
-    """
-
-    global _disable_member_update
-    _disable_member_update = not enabled
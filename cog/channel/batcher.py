@@ -0,0 +1,203 @@
+"""Coalesces mentions that add members to the same thread.
+
+Adding a member to a thread costs two edits of the thread's anchor
+message, one to add a mention and one to remove it. When many members
+need to be added to the same thread within a short time, the batcher
+here gathers their mentions and adds them with as few edits as
+possible before restoring the anchor once. A mention can be made to
+wait for its addition to another thread first, so that members still
+see their threads in the order they were added to them.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+import discord
+
+from cog.channel.anchor import Anchor
+
+# The maximum number of characters in a message.
+_MAX_MESSAGE_LENGTH = 2000
+
+# The number of seconds to gather mentions for a thread before
+# they are added to the thread's anchor message.
+_MENTION_BATCH_WINDOW = 1
+
+
+def split_mentions(mentions: list[str], content: str) -> list[list[str]]:
+    """Splits mentions so that each chunk fits in an anchor message.
+
+    Args:
+        mentions: The mentions to split.
+        content: The original content of the anchor message.
+
+    Returns:
+        The chunks of mentions, in order.
+    """
+
+    overhead = len(f'{content} [Adding ...]')
+    chunks = [[]]
+    length = overhead
+    for mention in mentions:
+        # Account for the space that separates mentions.
+        if chunks[-1] and length + 1 + len(mention) > _MAX_MESSAGE_LENGTH:
+            chunks.append([])
+            length = overhead
+
+        length += len(mention) + (1 if chunks[-1] else 0)
+        chunks[-1].append(mention)
+
+    return chunks if chunks[-1] else []
+
+
+class MentionBatcher:
+    """Gathers mentions for each thread and adds them in batches.
+
+    Args:
+        edit: A function that edits a thread's anchor message.
+        window: The number of seconds to gather mentions for a thread.
+    """
+
+    def __init__(
+        self,
+        edit: Callable[[discord.Thread, Anchor, str], Awaitable[None]],
+        window: float = _MENTION_BATCH_WINDOW
+    ) -> None:
+        self._edit = edit
+        self._window = window
+        self._pending = {}
+        self._flushers = {}
+
+    async def add(
+        self,
+        thread: discord.Thread,
+        anchor: Anchor,
+        mention: str,
+        after: asyncio.Future | None = None
+    ) -> None:
+        """Adds the members in a mention to a thread.
+
+        This returns once the mention has been added to the thread's
+        anchor message, which is when the members are added to the
+        thread. The anchor is restored in the background afterwards.
+
+        Args:
+            thread: The thread to add the members to.
+            anchor: The thread's anchor.
+            mention: The mention string to use to add the members.
+            after: A future that must be done before the mention is
+                added, such as the addition of the members to the
+                thread that they should be added to before this one.
+        """
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(thread.id, []).append(
+            (mention, future, after)
+        )
+        if thread.id not in self._flushers:
+            self._flushers[thread.id] = asyncio.create_task(
+                self._run(thread, anchor)
+            )
+
+        await future
+
+    async def _run(self, thread: discord.Thread, anchor: Anchor) -> None:
+        """Adds batches of mentions to a thread until there are none left.
+
+        Args:
+            thread: The thread to add the mentions to.
+            anchor: The thread's anchor.
+        """
+
+        try:
+            while self._pending.get(thread.id):
+                await asyncio.sleep(self._window)
+                batch = await self._take_ready(thread.id)
+                try:
+                    await self._flush(thread, anchor, batch)
+                except Exception as error:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(error)
+        finally:
+            del self._flushers[thread.id]
+
+    async def _take_ready(
+        self,
+        thread_id: int
+    ) -> list[tuple[str, asyncio.Future]]:
+        """Removes the mentions for a thread that are ready to be added.
+
+        A mention is ready once the future it has to wait for is done.
+        If none of the thread's mentions are ready, then this waits
+        until at least one of them is. Mentions that aren't ready are
+        left for the next batch.
+
+        Args:
+            thread_id: The ID of the thread to get the mentions of.
+
+        Returns:
+            The mentions to add and the futures to resolve
+            once each mention has been added.
+        """
+
+        while True:
+            pending = self._pending[thread_id]
+            waiting = [
+                after for _, _, after in pending
+                if after is not None and not after.done()
+            ]
+            if len(waiting) < len(pending):
+                break
+
+            await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+        batch = []
+        rest = []
+        for mention, future, after in pending:
+            if after is None or after.done():
+                batch.append((mention, future))
+            else:
+                rest.append((mention, future, after))
+
+        if rest:
+            self._pending[thread_id] = rest
+        else:
+            del self._pending[thread_id]
+
+        return batch
+
+    async def _flush(
+        self,
+        thread: discord.Thread,
+        anchor: Anchor,
+        batch: list[tuple[str, asyncio.Future]]
+    ) -> None:
+        """Adds a batch of mentions to a thread and then restores its anchor.
+
+        Args:
+            thread: The thread to add the mentions to.
+            anchor: The thread's anchor.
+            batch: The mentions to add and the futures to resolve
+                once each mention has been added.
+        """
+
+        # Group the futures by mention so that each mention
+        # is only added once, even if it was added many times.
+        futures = {}
+        for mention, future in batch:
+            futures.setdefault(mention, []).append(future)
+
+        try:
+            for chunk in split_mentions(list(futures), anchor.content):
+                await self._edit(
+                    thread,
+                    anchor,
+                    f'{anchor.content} [Adding {" ".join(chunk)}...]'
+                )
+                for mention in chunk:
+                    for future in futures[mention]:
+                        if not future.done():
+                            future.set_result(None)
+        finally:
+            await self._edit(thread, anchor, anchor.content)
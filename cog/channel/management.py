@@ -5,12 +5,17 @@ as a game channel and an associated role must be created for it. This
 and related functonality is provided here.
 """
 
+import bisect
 import asyncio
+from datetime import datetime, timedelta
 
 import discord
 from discord.ext import commands, tasks
 
 from data import Data
+from logsink import LogSink
+from scheduler import Priority, Route, Scheduler
+from cog.channel.anchor import AnchorRegistry, anchor_content
 
 # These constants are valid (and used) values for a
 # thread's auto archive duration and a text channel's
@@ -18,6 +23,25 @@ from data import Data
 THREE_DAYS_IN_MINS = 4320
 ONE_WEEK_IN_MINS = 10080
 
+# The number of hours between runs of the task that stops game
+# threads from automatically archiving.
+_KEEP_ALIVE_INTERVAL_HOURS = 24
+
+# How long after the next run of the keep alive task a thread must be
+# due to archive by for it to be refreshed. This gives a safety margin
+# in case a run is late or a refresh fails.
+_KEEP_ALIVE_MARGIN = timedelta(hours=24)
+
+# The length of time that the refreshes in a run of the keep
+# alive task are spread over, and the maximum number of threads
+# that can be refreshed at once.
+_KEEP_ALIVE_SPREAD = timedelta(hours=12)
+_KEEP_ALIVE_CONCURRENCY = 2
+
+# The maximum number of seconds to wait for the author's first message
+# in a new game thread before sending the thread's anchor anyway.
+_FIRST_MESSAGE_TIMEOUT = 30
+
 
 class ChannelManagement(commands.Cog):
     """A class to manage game channel and thread creation/deletion.
@@ -30,8 +54,34 @@ class ChannelManagement(commands.Cog):
         self._bot = bot
         self._guild = bot.guilds[0]
         self._data = Data()
+        self._anchors = AnchorRegistry()
+        self._scheduler = Scheduler()
+        self._log = LogSink()
+
+        # The threads of each game channel in the order that members
+        # should be added to them, kept up to date as threads change.
+        self._thread_order = {}
+        for channel_id in self._data.channel_ids():
+            channel = self._guild.get_channel(channel_id)
+            if channel is not None:
+                self._thread_order[channel_id] = sorted(
+                    (
+                        thread for thread in channel.threads
+                        if not (thread.archived or thread.locked)
+                    ),
+                    key=self._thread_order_key
+                )
+
         self._keep_alive.start()
 
+    async def cog_unload(self) -> None:
+        """Cleans up when the cog is unloaded or the bot shuts down."""
+
+        self._keep_alive.cancel()
+
+        # Make sure no changes to the data file are lost.
+        await self._data.flush()
+
     @staticmethod
     def _title(str_: str) -> str:
         """Converts a string from kebab case to title case.
@@ -45,6 +95,73 @@ class ChannelManagement(commands.Cog):
 
         return str_.replace('-', ' ').title()
 
+    @staticmethod
+    def _thread_order_key(thread: discord.Thread) -> tuple[bool, int]:
+        """Returns the key that threads are sorted by when adding members.
+
+        Threads appear at the top of a member's thread list for a
+        channel when they are added to them, so members are added to
+        the newest threads first to keep the order of thread creation.
+        'Patch Notes' threads are added last, oldest first, so that they
+        always appear at the top. We correct the thread order this way
+        because of the 'Patch Bot Incident', where a failure to continue
+        paying for Patch Bot resulted in deleted settings and a messed up
+        thread order.
+
+        Args:
+            thread: The thread to get the key of.
+        """
+
+        is_patch_notes = 'Patch Notes' in thread.name
+        return is_patch_notes, thread.id if is_patch_notes else -thread.id
+
+    def ordered_threads(
+        self,
+        channel: discord.TextChannel
+    ) -> list[discord.Thread]:
+        """Returns a channel's threads in the order to add members to them.
+
+        The list for a game channel is maintained as threads are created,
+        renamed, archived, reopened and deleted, so it must not be
+        modified by the caller.
+
+        Args:
+            channel: The channel to get the threads of.
+        """
+
+        threads = self._thread_order.get(channel.id)
+        if threads is None:
+            threads = sorted(channel.threads, key=self._thread_order_key)
+
+        return threads
+
+    def _index_thread(self, thread: discord.Thread) -> None:
+        """Adds a thread to its game channel's thread order.
+
+        Args:
+            thread: The thread to add.
+        """
+
+        threads = self._thread_order.setdefault(thread.parent_id, [])
+        if any(indexed.id == thread.id for indexed in threads):
+            return
+
+        bisect.insort(threads, thread, key=self._thread_order_key)
+
+    def _unindex_thread(self, thread_id: int, channel_id: int) -> None:
+        """Removes a thread from its game channel's thread order.
+
+        Args:
+            thread_id: The ID of the thread to remove.
+            channel_id: The ID of the thread's game channel.
+        """
+
+        threads = self._thread_order.get(channel_id, [])
+        for i, thread in enumerate(threads):
+            if thread.id == thread_id:
+                del threads[i]
+                break
+
     @commands.Cog.listener()
     async def on_guild_channel_create(
         self,
@@ -66,29 +183,43 @@ class ChannelManagement(commands.Cog):
         ):
             return
 
-        # Make the default auto archive duration for threads
-        # in the channel 1 week (the maximum).
-        await channel.edit(
-            default_auto_archive_duration=ONE_WEEK_IN_MINS
+        # Create a new role associated with the channel first,
+        # so that every change to the channel can be made at once.
+        game_name = self._title(channel.name)
+        new_role = await self._scheduler.submit(
+            Route.ROLE,
+            self._guild.id,
+            self._guild.create_role(name=game_name)
         )
 
         # Deny @everyone from viewing the channel, sending messages
-        # and creating threads.
-        await channel.set_permissions(
+        # and creating threads, and give the new role permission
+        # to view the channel. Any overwrites the channel already
+        # has (e.g. from its category) are kept.
+        overwrites = channel.overwrites
+        everyone_overwrite = overwrites.get(
             self._guild.default_role,
+            discord.PermissionOverwrite()
+        )
+        everyone_overwrite.update(
             view_channel=False,
             send_messages=False,
             create_public_threads=False,
             create_private_threads=False
         )
-
-        # Create a new role associated with the channel and
-        # give it permission to view the channel.
-        game_name = self._title(channel.name)
-        new_role = await self._guild.create_role(name=game_name)
-        await channel.set_permissions(
-            new_role,
-            view_channel=True
+        overwrites[self._guild.default_role] = everyone_overwrite
+        overwrites[new_role] = discord.PermissionOverwrite(view_channel=True)
+
+        # Make the default auto archive duration for threads in the
+        # channel 1 week (the maximum) and apply the overwrites in a
+        # single edit.
+        await self._scheduler.submit(
+            Route.CHANNEL,
+            channel.id,
+            channel.edit(
+                default_auto_archive_duration=ONE_WEEK_IN_MINS,
+                overwrites=overwrites
+            )
         )
 
         # Add the newly created channel to the data file.
@@ -97,13 +228,10 @@ class ChannelManagement(commands.Cog):
             new_role.id,
             channel.id
         )
+        self._thread_order[channel.id] = []
 
-        # Send a message to the log channel saying that
-        # the game has been added successfully.
-        log_channel = self._guild.get_channel(
-            self._data.log_channel_id
-        )
-        await log_channel.send(f'Registered channel: \'{game_name.upper()}\'')
+        # Log that the game has been added successfully.
+        self._log.log(f'Registered channel: \'{game_name.upper()}\'')
 
     @commands.Cog.listener()
     async def on_guild_channel_delete(
@@ -131,16 +259,11 @@ class ChannelManagement(commands.Cog):
 
         # Delete the data file entry.
         self._data.delete_game(channel.name)
-        log_channel = self._guild.get_channel(
-            self._data.log_channel_id
-        )
+        self._thread_order.pop(channel.id, None)
 
-        # Send a message to the log channel saying that
-        # the game has been deleted successfully.
+        # Log that the game has been deleted successfully.
         game_name = self._title(channel.name)
-        await log_channel.send(
-            f'Unregistered channel: \'{game_name.upper()}\''
-        )
+        self._log.log(f'Unregistered channel: \'{game_name.upper()}\'')
 
     @commands.Cog.listener()
     async def on_thread_create(
@@ -158,18 +281,37 @@ class ChannelManagement(commands.Cog):
         if thread.parent_id not in self._data.channel_ids():
             return
 
-        # Sleep for 5 seconds to allow the first message to
-        # be automatically sent in the thread by it's author.
-        await asyncio.sleep(5)
-
-        # Send a message to the created thread saying that
-        # it was successfully registered with the game. This
-        # message is also edited later with a mention
-        # to add a member to the thread without any notification.
-        await thread.send(
-            f'Registered this thread with '
-            f'\'{self._title(thread.parent.name).upper()}\'!'
-        )
+        self._index_thread(thread)
+
+        # Members may need to be added to the thread before its
+        # anchor exists, so have those requests wait for it.
+        self._anchors.expect(thread.id)
+        try:
+            # Wait for the first message to be automatically sent in
+            # the thread by its author, unless it has already arrived.
+            if thread.last_message_id is None:
+                try:
+                    await self._bot.wait_for(
+                        'message',
+                        check=lambda msg: msg.channel.id == thread.id,
+                        timeout=_FIRST_MESSAGE_TIMEOUT
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+            # Send a message to the created thread saying that
+            # it was successfully registered with the game. This
+            # message is also edited later with a mention
+            # to add a member to the thread without any notification,
+            # so register it as the thread's anchor.
+            message = await self._scheduler.submit(
+                Route.MESSAGE,
+                thread.id,
+                thread.send(anchor_content(thread.parent.name))
+            )
+            self._anchors.register(thread, message)
+        finally:
+            self._anchors.unexpect(thread.id)
 
     @commands.Cog.listener()
     async def on_thread_delete(
@@ -187,35 +329,180 @@ class ChannelManagement(commands.Cog):
         if thread.parent_id not in self._data.channel_ids():
             return
 
-        # Send a message to the log channel saying that the
-        # thread has been unregistered from the game.
-        log_channel = self._guild.get_channel(self._data.log_channel_id)
-        await log_channel.send(
+        # Log that the thread has been unregistered from the game.
+        self._log.log(
             f'Unregistered the \'{thread.name}\' thread '
             f'from \'{self._title(thread.parent.name).upper()}\'!'
         )
 
-    @tasks.loop(hours=24)
+    @commands.Cog.listener()
+    async def on_raw_thread_delete(
+        self,
+        event: discord.RawThreadDeleteEvent
+    ) -> None:
+        """Handles when a game channel's thread is deleted, cached or not.
+
+        Archived threads aren't cached, so this is where everything
+        stored about a deleted thread is removed.
+
+        Args:
+            event: The object that contains information about the deletion.
+        """
+
+        # If the thread's parent channel is not a game channel,
+        # then ignore it.
+        if event.parent_id not in self._data.channel_ids():
+            return
+
+        # The thread's anchor message no longer exists.
+        self._anchors.forget(event.thread_id)
+        self._unindex_thread(event.thread_id, event.parent_id)
+
+    @commands.Cog.listener()
+    async def on_thread_join(
+        self,
+        thread: discord.Thread
+    ) -> None:
+        """Handles when a game channel's thread is reopened.
+
+        Discord sends a thread that is unarchived back to the bot as a
+        thread join rather than a thread creation.
+
+        Args:
+            thread: The thread that was joined.
+        """
+
+        # If the thread's parent channel is not a game channel or
+        # members can't be added to the thread, then ignore it.
+        if (
+            thread.parent_id not in self._data.channel_ids()
+            or thread.archived
+            or thread.locked
+        ):
+            return
+
+        self._index_thread(thread)
+
+    @commands.Cog.listener()
+    async def on_thread_update(
+        self,
+        before: discord.Thread,
+        after: discord.Thread
+    ) -> None:
+        """Handles when a game channel's thread is renamed or archived.
+
+        Args:
+            before: The thread before it was updated.
+            after: The thread after it was updated.
+        """
+
+        # If the thread's parent channel is not a game channel or
+        # the thread wasn't renamed, archived, unarchived, locked or
+        # unlocked, then ignore it.
+        if (
+            after.parent_id not in self._data.channel_ids()
+            or (
+                before.name == after.name
+                and before.archived == after.archived
+                and before.locked == after.locked
+            )
+        ):
+            return
+
+        # Renaming a thread can change whether it is a 'Patch Notes'
+        # thread, so move it to its new place in the thread order.
+        # Archived and locked threads are dropped from the thread
+        # order since members can't be added to them.
+        self._unindex_thread(after.id, after.parent_id)
+        if not (after.archived or after.locked):
+            self._index_thread(after)
+
+    @staticmethod
+    def _archive_deadline(thread: discord.Thread) -> datetime:
+        """Returns when a thread will automatically archive if left alone.
+
+        A thread archives once it has been inactive for its auto archive
+        duration, where activity is the later of its last message and the
+        last change to its archive settings.
+
+        Args:
+            thread: The thread to get the archive deadline of.
+        """
+
+        last_activity = thread.archive_timestamp
+        if thread.last_message_id is not None:
+            last_activity = max(
+                last_activity,
+                discord.utils.snowflake_time(thread.last_message_id)
+            )
+
+        return last_activity + timedelta(minutes=thread.auto_archive_duration)
+
+    @tasks.loop(hours=_KEEP_ALIVE_INTERVAL_HOURS)
     async def _keep_alive(self) -> None:
         """Stops all game threads from automatically archiving.
 
         It does this by changing the automatic archive duration
-        on each game thread and then changing it back, which
-        resets the timer. The automatic archive duration is changed
-        everytime the bot starts up and then every 24 hours afterwards.
+        on a game thread and then changing it back, which resets
+        the timer. This runs everytime the bot starts up and then
+        every 24 hours afterwards, but only refreshes threads that
+        would otherwise archive before shortly after the next run.
+        The refreshes are spread out over time so that they don't
+        use up the rate limits needed by everything else.
         """
 
-        # Get all the game threads.
-        threads = filter(
-            lambda t: t.parent_id in self._data.channel_ids(),
-            self._guild.threads
+        # Get the game threads that need refreshing, soonest first.
+        now = discord.utils.utcnow()
+        horizon = (
+            now
+            + timedelta(hours=_KEEP_ALIVE_INTERVAL_HOURS)
+            + _KEEP_ALIVE_MARGIN
         )
+        game_channel_ids = self._data.channel_ids()
+        due = sorted(
+            (
+                (self._archive_deadline(thread), thread)
+                for thread in self._guild.threads
+                if thread.parent_id in game_channel_ids
+            ),
+            key=lambda item: item[0]
+        )
+        due = [
+            (deadline, thread)
+            for deadline, thread in due
+            if deadline < horizon
+        ]
+        if not due:
+            return
 
-        # Change the auto archive duration for each thread, and then
-        # change it back again.
-        for thread in threads:
-            await thread.edit(auto_archive_duration=THREE_DAYS_IN_MINS)
-            await thread.edit(auto_archive_duration=ONE_WEEK_IN_MINS)
+        # Spread the refreshes evenly, but never leave a thread
+        # for more than half of the time it has left.
+        spacing = _KEEP_ALIVE_SPREAD / len(due)
+        semaphore = asyncio.Semaphore(_KEEP_ALIVE_CONCURRENCY)
+
+        async def refresh(
+            i: int,
+            deadline: datetime,
+            thread: discord.Thread
+        ) -> None:
+            delay = min(i * spacing, (deadline - now) / 2)
+            await asyncio.sleep(max(delay.total_seconds(), 0))
+
+            # Change the auto archive duration for the thread,
+            # and then change it back again.
+            async with semaphore:
+                for duration in (THREE_DAYS_IN_MINS, ONE_WEEK_IN_MINS):
+                    await self._scheduler.submit(
+                        Route.CHANNEL,
+                        thread.id,
+                        thread.edit(auto_archive_duration=duration),
+                        Priority.BULK
+                    )
+
+        await asyncio.gather(*(
+            refresh(i, deadline, thread)
+            for i, (deadline, thread) in enumerate(due)
+        ))
 
 
 async def setup(bot: commands.Bot) -> None:
@@ -0,0 +1,184 @@
+"""Manages the roles used to add large roles to threads.
+
+A role mention in a thread only adds the role's members to the thread
+if the role has at most 99 members. Larger roles are split across
+partition roles that each hold part of the role's members. Rather than
+creating and deleting these roles on every sync, a pool of partition
+roles is kept for each large role and reused, and only the members
+whose partition has changed are added or removed.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+import discord
+
+from bulk import BulkRoleEditor
+from data import Data
+from scheduler import Priority, Route, Scheduler
+
+# The maximum number of members that can be in a role for a
+# role mention in a thread to add them all to the thread.
+MAX_ROLE_SIZE_FOR_THREAD_JOIN = 99
+
+# The namespace of the bot's persistent state that
+# the partition roles of each role are stored in.
+_NAMESPACE = 'partition-role'
+
+# The name given to the partition roles of a role, so that they can be
+# told apart from the role itself in a member's profile and role list.
+_PARTITION_ROLE_NAME = '{} (Thread Sync)'
+
+
+class PartitionRolePool:
+    """A pool of partition roles for each large role.
+
+    Args:
+        guild: The guild the roles are in.
+    """
+
+    def __init__(self, guild: discord.Guild) -> None:
+        self._guild = guild
+        self._data = Data()
+        self._scheduler = Scheduler()
+
+    async def partition(
+        self,
+        role: discord.Role,
+        progress: Callable[[int, int], Awaitable[None]] | None = None
+    ) -> tuple[list[discord.Role], int]:
+        """Splits a role's members across partition roles.
+
+        Members keep their partition from previous syncs where
+        possible, so only new and departed members cause changes.
+
+        Args:
+            role: The role to split.
+            progress: A function that is periodically called with the
+                number of members that have been moved between partition
+                roles and the total number that need to be moved.
+
+        Returns:
+            The roles whose mentions add every member of the role to a
+            thread, and the number of members that couldn't be added to
+            or removed from a partition role.
+        """
+
+        # If the role is small enough to be mentioned on its own, then
+        # it doesn't need partition roles, so release any it still has.
+        members = {member.id: member for member in role.members}
+        if len(members) <= MAX_ROLE_SIZE_FOR_THREAD_JOIN:
+            await self.release(role)
+            return [role], 0
+
+        # Get the role's partition roles, ignoring any
+        # that have been deleted since the last sync.
+        pool = [
+            pool_role
+            for id_ in self._data.get_state(_NAMESPACE, role.id, [])
+            if (pool_role := self._guild.get_role(id_)) is not None
+        ]
+
+        # Rename any partition roles that were created with the role's
+        # own name or before the role was renamed.
+        name = _PARTITION_ROLE_NAME.format(role.name)
+        await asyncio.gather(
+            *(
+                self._scheduler.submit(
+                    Route.ROLE,
+                    self._guild.id,
+                    pool_role.edit(name=name),
+                    Priority.BULK
+                )
+                for pool_role in pool
+                if pool_role.name != name
+            )
+        )
+
+        # Keep members in their current partition if they're still in the
+        # role, and remove members who have left the role. A member can only
+        # be in one partition.
+        partitions = {}
+        unassigned = set(members)
+        editor = BulkRoleEditor(progress)
+        for pool_role in pool:
+            current = {member.id: member for member in pool_role.members}
+            kept = sorted(current.keys() & unassigned)
+            kept = set(kept[:MAX_ROLE_SIZE_FOR_THREAD_JOIN])
+            unassigned -= kept
+            partitions[pool_role] = kept
+            editor.remove(
+                (current[id_] for id_ in current.keys() - kept),
+                pool_role
+            )
+
+        # Create more partition roles if the pool doesn't have enough room.
+        room = sum(
+            MAX_ROLE_SIZE_FOR_THREAD_JOIN - len(kept)
+            for kept in partitions.values()
+        )
+        missing = len(unassigned) - room
+        # New roles are placed at the bottom of the role list, and
+        # aren't hoisted so that members aren't displayed under them.
+        for _ in range(-(missing // -MAX_ROLE_SIZE_FOR_THREAD_JOIN)):
+            new_role = await self._scheduler.submit(
+                Route.ROLE,
+                self._guild.id,
+                self._guild.create_role(
+                    name=name,
+                    permissions=discord.Permissions.none(),
+                    hoist=False
+                ),
+                Priority.BULK
+            )
+            pool.append(new_role)
+            partitions[new_role] = set()
+
+        self._data.set_state(
+            _NAMESPACE,
+            role.id,
+            [pool_role.id for pool_role in pool]
+        )
+
+        # Fill the partitions with the unassigned members.
+        unassigned = sorted(unassigned)
+        for pool_role, kept in partitions.items():
+            added = unassigned[:MAX_ROLE_SIZE_FOR_THREAD_JOIN - len(kept)]
+            unassigned = unassigned[len(added):]
+            kept.update(added)
+            editor.add((members[id_] for id_ in added), pool_role)
+
+        # Apply the changes concurrently and wait for them to finish.
+        result = await editor.apply()
+
+        return [
+            pool_role for pool_role, kept in partitions.items() if kept
+        ], result.failed
+
+    async def release(self, role: discord.Role) -> None:
+        """Deletes a role's partition roles, if it has any.
+
+        Deleting a partition role also removes it from its members,
+        so this takes a single request per partition role.
+
+        Args:
+            role: The role to release the partition roles of.
+        """
+
+        pool_ids = self._data.get_state(_NAMESPACE, role.id, [])
+        if not pool_ids:
+            return
+
+        await asyncio.gather(
+            *(
+                self._scheduler.submit(
+                    Route.ROLE,
+                    self._guild.id,
+                    pool_role.delete(),
+                    Priority.BULK
+                )
+                for id_ in pool_ids
+                if (pool_role := self._guild.get_role(id_)) is not None
+            )
+        )
+        self._data.delete_state(_NAMESPACE, role.id)
@@ -0,0 +1,224 @@
+"""Keeps an index of the guild's members by name.
+
+Looking members up by name through the Discord API is slow and rate
+limited, and only supports prefix matching. The index here maps the
+normalised username, global name and nickname of every member in the
+guild to the member, and is kept up to date as members join, leave and
+change their names, so most lookups don't need a request at all.
+"""
+
+import discord
+from discord.ext import commands
+
+
+def normalise(name: str) -> str:
+    """Returns the form of a name that is used to look it up.
+
+    Args:
+        name: The name to normalise.
+    """
+
+    # Drop a leading '@' and a trailing legacy discriminator
+    # (e.g. '#1234') that are often included with usernames.
+    name = name.strip().removeprefix('@').split('#')[0]
+
+    return name.strip().casefold()
+
+
+class MemberIndex(commands.Cog):
+    """A class to look up the guild's members by name.
+
+    Args:
+        bot: The bot to add this cog to.
+    """
+
+    def __init__(self, bot: commands.Bot) -> None:
+        self._bot = bot
+        self._guild = bot.guilds[0]
+
+        # Usernames are unique, but many members can share a
+        # global name or nickname. The names each member is
+        # indexed under are kept so that they can be removed.
+        self._by_username = {}
+        self._by_display_name = {}
+        self._names = {}
+        for member in self._guild.members:
+            self._index(member)
+
+    def _index(self, member: discord.Member) -> None:
+        """Adds a member to the index under their current names.
+
+        Args:
+            member: The member to add.
+        """
+
+        username = normalise(member.name)
+        display_names = {
+            normalise(name)
+            for name in (member.global_name, member.nick)
+            if name
+        }
+
+        self._by_username[username] = member.id
+        for name in display_names:
+            self._by_display_name.setdefault(name, set()).add(member.id)
+        self._names[member.id] = (username, display_names)
+
+    def _unindex(self, member_id: int) -> None:
+        """Removes a member from the index.
+
+        Args:
+            member_id: The ID of the member to remove.
+        """
+
+        names = self._names.pop(member_id, None)
+        if names is None:
+            return
+
+        username, display_names = names
+        if self._by_username.get(username) == member_id:
+            del self._by_username[username]
+        for name in display_names:
+            ids = self._by_display_name[name]
+            ids.discard(member_id)
+            if not ids:
+                del self._by_display_name[name]
+
+    def lookup(self, name: str) -> list[discord.Member]:
+        """Returns the members with a name in the index.
+
+        A member whose username matches is returned on its own, since
+        usernames are unique. Otherwise, every member whose global name
+        or nickname matches is returned.
+
+        Args:
+            name: The username, global name, nickname or ID to look up.
+        """
+
+        # Members are sometimes given by their ID rather than a name.
+        if name.strip().isdigit():
+            member = self._guild.get_member(int(name))
+            if member is not None:
+                return [member]
+
+        name = normalise(name)
+        member_id = self._by_username.get(name)
+        if member_id is not None:
+            member_ids = [member_id]
+        else:
+            member_ids = self._by_display_name.get(name, ())
+
+        return [
+            member
+            for id_ in member_ids
+            if (member := self._guild.get_member(id_)) is not None
+        ]
+
+    async def find(self, name: str) -> list[discord.Member]:
+        """Returns the members with a name, asking Discord if required.
+
+        The index is used if it has any matches. Otherwise, the guild's
+        members are queried and only exact matches are kept where there
+        are any, since the query also matches names by prefix.
+
+        Args:
+            name: The username, global name, nickname or ID to look up.
+        """
+
+        members = self.lookup(name)
+        query = normalise(name)
+        if members or not query:
+            return members
+
+        members = await self._guild.query_members(query=query)
+        exact = [
+            member
+            for member in members
+            if query in {
+                normalise(member_name)
+                for member_name in (
+                    member.name,
+                    member.global_name,
+                    member.nick
+                )
+                if member_name
+            }
+        ]
+
+        return exact or members
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member) -> None:
+        """Handles when a member joins the guild.
+
+        Args:
+            member: The member that joined.
+        """
+
+        self._index(member)
+
+    @commands.Cog.listener()
+    async def on_raw_member_remove(
+        self,
+        payload: discord.RawMemberRemoveEvent
+    ) -> None:
+        """Handles when a member leaves the guild.
+
+        The raw event is used because the member may not be cached.
+
+        Args:
+            payload: The event payload with the member that left.
+        """
+
+        self._unindex(payload.user.id)
+
+    @commands.Cog.listener()
+    async def on_member_update(
+        self,
+        before: discord.Member,
+        after: discord.Member
+    ) -> None:
+        """Handles when a member changes their nickname.
+
+        Args:
+            before: The member before the update.
+            after: The member after the update.
+        """
+
+        if before.nick != after.nick:
+            self._unindex(after.id)
+            self._index(after)
+
+    @commands.Cog.listener()
+    async def on_user_update(
+        self,
+        before: discord.User,
+        after: discord.User
+    ) -> None:
+        """Handles when a user changes their username or global name.
+
+        Args:
+            before: The user before the update.
+            after: The user after the update.
+        """
+
+        if (
+            before.name == after.name
+            and before.global_name == after.global_name
+        ):
+            return
+
+        member = self._guild.get_member(after.id)
+        if member is not None:
+            self._unindex(member.id)
+            self._index(member)
+
+
+async def setup(bot: commands.Bot) -> None:
+    """A hook for the bot to register the MemberIndex cog.
+
+    Args:
+        bot: The bot to add this cog to.
+    """
+
+    await bot.add_cog(MemberIndex(bot))
@@ -5,18 +5,30 @@ fit into an already established category and/or
 do not contribute to the main goals of the bot.
 """
 
+import io
+import csv
+import asyncio
+
 import discord
 from discord import app_commands
 from discord.ext import commands
 
-import codecs
-import requests
-import csv
-from contextlib import closing
+from bulk import BulkRoleEditor, BulkResult, interaction_progress
+from data import Data
+from scheduler import Priority, Scheduler
+from util import stream_csv
+from cog.channel.anchor import AnchorRegistry
 
-from cog.channel import assignment
-from util import get_nth_msg
-from data import MISC_GAMES_CHANNEL_NAME
+# The maximum number of threads that can have
+# their bot message fixed at once.
+_FIX_CONCURRENCY = 5
+
+# The largest fraction of a membership role's members that a reconciling
+# /update-membership can remove, unless the same removals were reviewed
+# in a dry run first, and the largest fraction of usernames in the file
+# that can have no match before reconciling is refused.
+_MAX_RECONCILE_REMOVAL_FRACTION = 0.2
+_MAX_RECONCILE_NO_MATCH_FRACTION = 0.2
 
 
 class Misc(commands.Cog):
@@ -29,6 +41,15 @@ class Misc(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self._bot = bot
         self._guild = bot.guilds[0]
+        self._data = Data()
+        self._anchors = AnchorRegistry()
+        self._scheduler = Scheduler()
+        self._assignment = bot.get_cog('ChannelAssignment')
+        self._members = bot.get_cog('MemberIndex')
+
+        # The IDs of the members that the last reconciling dry run
+        # of /update-membership would remove from each role.
+        self._reviewed_removals = {}
 
     @discord.app_commands.checks.has_role('Admin')
     @app_commands.command(name='add-members')
@@ -50,49 +71,87 @@ class Misc(commands.Cog):
             role_to: The role to add members to.
         """
 
-        # Flag that the on_member_update event should be disabled,
-        # because otherwise a new member update event is fired each
-        # time a new role is assigned which rapidly leads to too many
-        # operations happening at the same time and rate limiting.
-        assignment.set_member_update_state(False)
-
         # Defer the bot's response to give time for
         # the members to be added to the role.
         await interaction.response.defer(thinking=True)
 
-        # Add the members to the role.
-        for member in role_from.members:
-            await member.add_roles(role_to)
+        # Suppress the on_member_update event for the members being
+        # added, because otherwise a new member update event is fired
+        # each time a new role is assigned which rapidly leads to too
+        # many operations happening at the same time and rate limiting.
+        # If the role is a game role, then the members are added to its
+        # threads together once they have all been given the role.
+        members = role_from.members
+        editor = BulkRoleEditor(interaction_progress(
+            interaction,
+            f'Adding members to {role_to.mention}'
+        ))
+        editor.add(members, role_to)
+        async with self._assignment.suppress_member_updates(
+            member.id for member in members
+        ):
+            # Add the role to the members who don't already
+            # have it and wait for them all to be added.
+            result = await editor.apply()
 
         # Stop deferring and report that the bot has finished.
         await interaction.followup.send(
             f'Successfully added members from '
-            f'{role_from.mention} to {role_to.mention}!'
+            f'{role_from.mention} to {role_to.mention}!\n\n'
+            + self._bulk_summary(result, 'added', 'already had the role')
         )
 
-        # Flag that the on_member_update event can be enabled again.
-        assignment.set_member_update_state(True)
+    def _bulk_summary(
+        self,
+        result: BulkResult,
+        changed: str,
+        skipped: str
+    ) -> str:
+        """Returns a summary of the outcome of bulk role changes.
+
+        Args:
+            result: The outcome of the changes.
+            changed: What happened to members who were changed.
+            skipped: Why members who were skipped didn't need changing.
+        """
+
+        return (
+            f'{result.changed} member(s) {changed} in '
+            f'{result.seconds:.0f}s ({result.rate:.1f}/s), '
+            f'{result.skipped} member(s) skipped that {skipped}.'
+            + (f'\n\n{result.failed} member(s) failed.'
+               if result.failed else '')
+        )
 
     @discord.app_commands.checks.has_role('Admin')
     @app_commands.command(name='fix-message')
     async def fix_message(
         self,
         interaction: discord.Interaction,
-        channel: discord.abc.GuildChannel,
+        channel: discord.abc.GuildChannel | None = None,
     ) -> None:
-        """Replaces a broken bot message with it's original content.
+        """Replaces broken bot messages with their original content.
 
         Sometimes when members are added too quickly to a thread, the
         bot message that is edited with a mention to add them gets
         clogged with member mentions. This manually fixes all those
         messages for all threads in a channel by replacing the content
-        of the bot message with what it was originally.
+        of the bot message with what it was originally. Messages that
+        aren't clogged are left alone.
 
         Args:
             interaction: The interaction object for the slash command.
-            channel: The channel with the threads that have messages to fix.
+            channel: The channel with the threads that have messages to
+                fix, or None to fix the messages in every game channel.
         """
-        if not isinstance(channel, discord.TextChannel):
+        if channel is None:
+            channels = [
+                self._guild.get_channel(channel_id)
+                for channel_id in self._data.channel_ids()
+            ]
+        elif isinstance(channel, discord.TextChannel):
+            channels = [channel]
+        else:
             await interaction.response.send_message(content='Not a text channel.', ephemeral=True)
             return
 
@@ -100,24 +159,62 @@ class Misc(commands.Cog):
         # the fix to complete.
         await interaction.response.defer(thinking=True)
 
-        is_misc = channel.name == MISC_GAMES_CHANNEL_NAME
-        for thread in channel.threads:
-            # Get the first message ever sent in the thread,
-            # which is the message sent by the bot at the
-            # thread's creation.
-            bot_message = await get_nth_msg(thread, 2 if is_misc else 1)
-
-            # The original content of the bot message.
-            og_content = (
-                f'Registered this thread with '
-                f'\'{channel.name.replace("-", " ").upper()}\'!'
-            )
-
-            # Replace the bot message with it's original content.
-            await bot_message.edit(content=og_content)
+        semaphore = asyncio.Semaphore(_FIX_CONCURRENCY)
+
+        async def fix(thread: discord.Thread) -> bool:
+            async with semaphore:
+                # Get the message sent by the bot at the thread's creation
+                # and replace it with it's original content if required.
+                anchor = await self._anchors.get(thread)
+                return await self._anchors.repair(
+                    thread,
+                    anchor,
+                    Priority.BULK
+                )
+
+        # Check every thread concurrently and count the outcomes.
+        results = await asyncio.gather(
+            *(
+                fix(thread)
+                for channel in channels
+                if channel is not None
+                for thread in channel.threads
+            ),
+            return_exceptions=True
+        )
+        fixed = results.count(True)
+        unchanged = results.count(False)
+        failed = len(results) - fixed - unchanged
 
         # Stop deferring and report that the bot has finished.
-        await interaction.followup.send('Fixed!')
+        await interaction.followup.send(
+            f'Fixed {fixed} message(s) and left {unchanged} '
+            f'message(s) that weren\'t broken.'
+            + (f'\n\n{failed} message(s) could not be fixed.'
+               if failed else '')
+        )
+
+    @discord.app_commands.checks.has_role('Admin')
+    @app_commands.command(name='scheduler-stats')
+    async def scheduler_stats(
+        self,
+        interaction: discord.Interaction
+    ) -> None:
+        """Reports what the request scheduler has been doing.
+
+        Args:
+            interaction: The interaction object for the slash command.
+        """
+
+        counters = self._scheduler.counters()
+        await interaction.response.send_message(
+            f'Submitted: {counters["submitted"]}\n'
+            f'Throttled: {counters["throttled"]}\n'
+            f'Failed: {counters["failed"]}\n'
+            f'Queued (interactive): {counters["queued"]["interactive"]}\n'
+            f'Queued (bulk): {counters["queued"]["bulk"]}',
+            ephemeral=True
+        )
 
     @discord.app_commands.checks.has_role('Admin')
     @app_commands.command(name='update-membership')
@@ -125,7 +222,9 @@ class Misc(commands.Cog):
         self,
         interaction: discord.Interaction,
         customisations_csv: discord.Attachment,
-        role: discord.Role
+        role: discord.Role,
+        reconcile: bool = False,
+        dry_run: bool = False
     ) -> None:
         """Adds members from an UMSU customisations file to a role.
 
@@ -133,6 +232,11 @@ class Misc(commands.Cog):
             interaction: The interaction object for the slash command.
             customisations_csv: The members customisations csv file.
             role: The membership role to add members to.
+            reconcile: Whether to also remove the role from
+                members who aren't in the file. Removing a large
+                part of the role must be reviewed in a dry run first.
+            dry_run: Whether to only report the changes
+                that would be made instead of making them.
         """
 
         # Defer the bot's response to give time for
@@ -144,37 +248,133 @@ class Misc(commands.Cog):
         # otherwise report them appropriately.
         no_matches = []
         multiple_matches = []
-        with closing(requests.get(customisations_csv.url, stream=True)) as r:
-            reader = csv.reader(codecs.iterdecode(r.iter_lines(), 'utf-8'))
-            for row in reader:
-                # If the row doesn't contain enough values to be able
-                # to have the information we need, then skip it.
-                if len(row) < 7:
-                    continue
-
-                # 5 is the index of the questions column.
-                if row[5] == 'Discord ID' or row[5] == 'Discord Username':
-                    # 6 is the index of the answers column.
-                    # Here we also remove the tag if it exists
-                    # because the query_members method doesn't like it.
-                    member_username = row[6].split('#')[0]
-
-                    matching_members = await self._guild.query_members(
-                        query=member_username
-                    )
-                    match len(matching_members):
-                        case 0:
-                            no_matches.append(member_username)
-                        case 1:
-                            await matching_members[0].add_roles(role)
-                        case _:
-                            multiple_matches.append(member_username)
+        matches = []
+        ambiguous_ids = set()
+        async for row in stream_csv(customisations_csv.url):
+            # If the row doesn't contain enough values to be able
+            # to have the information we need, then skip it.
+            if len(row) < 7:
+                continue
+
+            # 5 is the index of the questions column.
+            if row[5] == 'Discord ID' or row[5] == 'Discord Username':
+                # 6 is the index of the answers column.
+                # Here we also remove the tag if it exists
+                # because it isn't part of the username.
+                member_username = row[6].split('#')[0]
+
+                # Look the member up in the bot's index of member
+                # names, which only asks Discord if there's no match.
+                matching_members = await self._members.find(member_username)
+                match len(matching_members):
+                    case 0:
+                        no_matches.append(member_username)
+                    case 1:
+                        matches.append(matching_members[0])
+                    case _:
+                        multiple_matches.append(member_username)
+                        ambiguous_ids.update(
+                            member.id for member in matching_members
+                        )
+
+        # Work out which members need the role added, and which need
+        # it removed if reconciling, by comparing the matched members
+        # with the role's current members. Members who might be one
+        # of the multiple matches for a row are never removed.
+        matched = {member.id: member for member in matches}
+        current = {member.id: member for member in role.members}
+        to_add = [
+            member for id_, member in matched.items() if id_ not in current
+        ]
+        to_remove = [
+            member
+            for id_, member in current.items()
+            if id_ not in matched and id_ not in ambiguous_ids
+        ] if reconcile else []
+        unchanged = len(matched.keys() & current.keys())
+
+        summary = (
+            f'{len(to_add)} member(s) to add, {len(to_remove)} member(s) '
+            f'to remove and {unchanged} member(s) already up to date.\n\n'
+            f'No matches found for: {no_matches}\n\n'
+            f'Multiple matches found for: {multiple_matches}'
+        )
+
+        # If this is a dry run, then send the changes
+        # as a file instead of making them.
+        remove_ids = frozenset(member.id for member in to_remove)
+        if dry_run:
+            if reconcile:
+                self._reviewed_removals[role.id] = remove_ids
+            diff = io.StringIO()
+            writer = csv.writer(diff)
+            writer.writerow(('action', 'member id', 'username'))
+            writer.writerows(
+                ('add', member.id, member.name) for member in to_add
+            )
+            writer.writerows(
+                ('remove', member.id, member.name) for member in to_remove
+            )
+            await interaction.followup.send(
+                f'Dry run for {role.mention}!\n\n{summary}',
+                file=discord.File(
+                    io.BytesIO(diff.getvalue().encode()),
+                    filename='membership-diff.csv'
+                )
+            )
+            return
+
+        # A file that is malformed or for the wrong role matches few
+        # or none of the role's members, and reconciling would then
+        # remove the role from almost everyone. Refuse to do that.
+        if reconcile:
+            refusal = None
+            usernames = len(matches) + len(no_matches) + len(multiple_matches)
+            if not matched:
+                refusal = 'no members in the file could be matched'
+            elif (
+                len(no_matches)
+                > usernames * _MAX_RECONCILE_NO_MATCH_FRACTION
+            ):
+                refusal = (
+                    f'{len(no_matches)} of the {usernames} username(s) in '
+                    f'the file couldn\'t be matched'
+                )
+            elif (
+                len(to_remove) > len(current) * _MAX_RECONCILE_REMOVAL_FRACTION
+                and self._reviewed_removals.get(role.id) != remove_ids
+            ):
+                refusal = (
+                    f'{len(to_remove)} of the {len(current)} member(s) of '
+                    f'the role would be removed, so please review these '
+                    f'removals with a dry run first'
+                )
+
+            if refusal is not None:
+                await interaction.followup.send(
+                    f'Refusing to reconcile {role.mention} because '
+                    f'{refusal}. No changes were made.\n\n{summary}'
+                )
+                return
+
+            self._reviewed_removals.pop(role.id, None)
+
+        # Apply the changes concurrently and wait for them to finish.
+        editor = BulkRoleEditor(interaction_progress(
+            interaction,
+            f'Updating the members of {role.mention}'
+        ))
+        editor.add(to_add, role)
+        editor.remove(to_remove, role)
+        result = await editor.apply()
 
         # Stop deferring and send a summary.
         await interaction.followup.send(
-            f'Done!\n\n'
-            f'No matches found for: {no_matches}\n\n'
-            f'Multiple matches found for: {multiple_matches}'
+            f'Done!\n\n{summary}\n\n'
+            f'Made {result.changed} change(s) in {result.seconds:.0f}s '
+            f'({result.rate:.1f}/s).'
+            + (f'\n\n{result.failed} change(s) failed.'
+               if result.failed else '')
         )
 
 
@@ -7,6 +7,8 @@ import discord
 import re
 import time
 
+from scheduler import Route, Scheduler
+
 class HideButton(discord.ui.View):
     """View to store hide channel button
     
@@ -40,10 +42,18 @@ class HideButton(discord.ui.View):
         button: Required by Discord interaction but not used here
         """
         await interaction.response.send_message("Closing ticket...")
-        await interaction.channel.edit(sync_permissions=True)
+        await Scheduler().submit(
+            Route.CHANNEL,
+            interaction.channel.id,
+            interaction.channel.edit(sync_permissions=True)
+        )
         # Check if the ticket was empty (second last message was from this bot)
         # Ignores the closing ticket message.
         last_message = interaction.channel.history(limit=2)
         user = [message.author async for message in last_message][1]
         if user == interaction.client.user:
-            await interaction.channel.delete()
\ No newline at end of file
+            await Scheduler().submit(
+                Route.CHANNEL,
+                interaction.guild.id,
+                interaction.channel.delete()
+            )
\ No newline at end of file
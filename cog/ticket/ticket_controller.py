@@ -3,6 +3,7 @@
 from .ticket_data import TicketData
 from .interactables import HideButton
 from .ticketing import TicketManagement
+from scheduler import Priority, Route
 
 import discord
 from discord.ext import commands
@@ -62,7 +63,12 @@ class TicketController(TicketManagement):
             # delete messages older than stale_date or empty tickets
             # last message was the hide button sent by the bot
             if date < stale_date or message.components:
-                await channel.delete()
+                await self._scheduler.submit(
+                    Route.CHANNEL,
+                    self._guild.id,
+                    channel.delete(),
+                    Priority.BULK
+                )
                 tickets_deleted += 1
             
         await interaction.followup.send(
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from .ticketing import TicketManagement
+from .ticketing import TicketIdAllocator, TicketManagement
 
 import discord
 from discord.ext import commands
@@ -25,11 +25,6 @@ class TicketModule(TicketManagement):
         self._ticket_prefix = ticket_prefix
         embed_data = self._data.module(self._ticket_prefix)["embeds"]
         self._embeds = self.load_embed(embed_data)
-        # get all currently used ticket ids
-        self._used_ticket_ids = [
-            int(channel.name[-3:])
-            for channel in self._category.channels
-            if self._ticket_prefix in channel.name]
         bot.add_dynamic_items(self.TicketButton)
         self._category_id = (
             self._data.module(ticket_prefix)["category_id"]
@@ -37,6 +32,34 @@ class TicketModule(TicketManagement):
         self._category = discord.utils.get(
             self.bot.guilds[0].categories, id=self._category_id
         )
+        # get all currently used ticket ids in one pass over this
+        # module's category
+        self._ticket_name = re.compile(
+            rf"{re.escape(self._ticket_prefix)}-([0-9]{{3}})"
+        )
+        self._ticket_ids = TicketIdAllocator(
+            int(match[1])
+            for channel in self._category.channels
+            if (match := self._ticket_name.fullmatch(channel.name))
+        )
+    
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(
+        self,
+        channel: discord.abc.GuildChannel
+    ) -> None:
+        """Releases the ticket Id of a deleted ticket channel
+        
+        Args:
+            channel: The channel that was deleted
+        """
+        
+        if channel.category_id != self._category_id:
+            return
+        
+        match = self._ticket_name.fullmatch(channel.name)
+        if match:
+            self._ticket_ids.release(int(match[1]))
     
     def get_ticket_button(self, label=None, emoji=None) -> discord.Button:
         return self.TicketButton(self, label, emoji)
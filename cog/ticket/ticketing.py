@@ -6,11 +6,14 @@ specific functionality, another Cog should be created and inherit this class.
 
 from .ticket_data import TicketData
 from .interactables import HideButton
+from scheduler import Route, Scheduler
 
 import discord
 from discord.ext import commands
 
 import json
+import heapq
+from collections.abc import Iterable
 from datetime import timedelta
 
 TIME_UNTIL_TICKET_STALE = timedelta(weeks=2)
@@ -18,6 +21,63 @@ MAX_TICKETS_PER_USER = 3
 MAX_TICKETS = 500
 MAX_TICKET_ID = 999
 
+class TicketIdAllocator:
+    """Allocates ticket Ids for a single ticket prefix
+    
+    Free Ids are kept in a min-heap, so the lowest free Id is always
+    allocated and both allocating and releasing an Id take O(log n) time.
+    Allocating doesn't await anything, so concurrent ticket creations can
+    never be given the same Id.
+    
+    Args:
+        used_ids: Ids of the tickets that are currently open
+        max_id: Highest Id that can be allocated
+    """
+    
+    def __init__(
+        self,
+        used_ids: Iterable[int],
+        max_id: int = MAX_TICKET_ID
+    ) -> None:
+        
+        self._used_ids = {
+            ticket_id for ticket_id in used_ids if 1 <= ticket_id <= max_id
+        }
+        self._free_ids = [
+            ticket_id
+            for ticket_id in range(1, max_id + 1)
+            if ticket_id not in self._used_ids
+        ]
+        heapq.heapify(self._free_ids)
+    
+    def allocate(self) -> int | None:
+        """Allocates the lowest free ticket Id
+        
+        Returns:
+            Ticket Id, or None if every Id is in use
+        """
+        
+        if not self._free_ids:
+            return None
+        
+        ticket_id = heapq.heappop(self._free_ids)
+        self._used_ids.add(ticket_id)
+        
+        return ticket_id
+    
+    def release(self, ticket_id: int) -> None:
+        """Makes a ticket Id free to be allocated again
+        
+        Releasing an Id that isn't in use does nothing
+        
+        Args:
+            ticket_id: Id of the ticket that was closed
+        """
+        
+        if ticket_id in self._used_ids:
+            self._used_ids.remove(ticket_id)
+            heapq.heappush(self._free_ids, ticket_id)
+
 class TicketManagement(commands.Cog):
     """A class to manage ticket creation/deletion
     
@@ -40,8 +100,9 @@ class TicketManagement(commands.Cog):
         )
         self._max_tickets_per_user = MAX_TICKETS_PER_USER
         self._time_until_ticket_stale = TIME_UNTIL_TICKET_STALE
-        self._used_ticket_ids = []
+        self._ticket_ids = TicketIdAllocator(())
         self._embeds = None
+        self._scheduler = Scheduler()
         
     async def send_embed(
         self,
@@ -55,7 +116,9 @@ class TicketManagement(commands.Cog):
             embed: embed object to be sent
         """
         
-        await channel.send(embed=embed)
+        await self._scheduler.submit(
+            Route.MESSAGE, channel.id, channel.send(embed=embed)
+        )
         
     def load_embed(
         self,
@@ -91,7 +154,9 @@ class TicketManagement(commands.Cog):
             view: view object to be sent
         """
         
-        await channel.send(view=view)
+        await self._scheduler.submit(
+            Route.MESSAGE, channel.id, channel.send(view=view)
+        )
     
     async def create_channel(
         self,
@@ -115,10 +180,16 @@ class TicketManagement(commands.Cog):
         """
         
         category = discord.utils.get(self._guild.categories, id=category_id)
-        channel = await self._guild.create_text_channel(
-            name,
-            category=category)
-        await channel.set_permissions(user_id, overwrite=permissions)
+        channel = await self._scheduler.submit(
+            Route.CHANNEL,
+            self._guild.id,
+            self._guild.create_text_channel(name, category=category)
+        )
+        await self._scheduler.submit(
+            Route.CHANNEL,
+            channel.id,
+            channel.set_permissions(user_id, overwrite=permissions)
+        )
         
         return channel
     
@@ -145,31 +216,16 @@ class TicketManagement(commands.Cog):
         
         return embed
     
-    def get_next_ticket_id(self):
+    def get_next_ticket_id(self) -> int | None:
         """Retrieves the next valid ticket Id
-        Finds Id based on the following:
-        Get highest ticket number possible, or
-        start from Id=1 and increment until unused id is found
-        
-        Naively assumes that there will always be an available id 
-        (MAX_TICKET_ID > MAX_TICKETS)
+        The lowest Id that isn't used by an open ticket is allocated, and
+        it stays allocated until the ticket's channel is deleted
         
         Returns:
-            Ticket Id
+            Ticket Id, or None if every Id up to MAX_TICKET_ID is in use
         """
         
-        if not self._used_ticket_ids:
-            return 1
-        
-        ticket_id = self._used_ticket_ids[-1]
-        
-        while ticket_id in self._used_ticket_ids:
-            if ticket_id == self._used_ticket_ids:
-                ticket_id = 1
-            else:
-                ticket_id += 1
-        
-        return ticket_id
+        return self._ticket_ids.allocate()
     
     async def create_ticket(
         self, 
@@ -198,19 +254,32 @@ class TicketManagement(commands.Cog):
                 content="ERROR: Maximum number of tickets opened")
             return
         
-        permission = discord.PermissionOverwrite(view_channel=True)
         ticket_id = self.get_next_ticket_id()
-        channel = await self.create_channel(
-            f"{self._ticket_prefix}-{ticket_id:03d}",
-            self._category_id,
-            interaction.user,
-            permission
-        )
-        self._used_ticket_ids.append(ticket_id)
+        if ticket_id is None:
+            await interaction.edit_original_response(
+                content="ERROR: Maximum number of tickets reached")
+            return
+        
+        permission = discord.PermissionOverwrite(view_channel=True)
+        try:
+            channel = await self.create_channel(
+                f"{self._ticket_prefix}-{ticket_id:03d}",
+                self._category_id,
+                interaction.user,
+                permission
+            )
+        except BaseException:
+            # the ticket was never opened so its id can be used again
+            self._ticket_ids.release(ticket_id)
+            raise
         
         for embed in self._embeds:
             await self.send_embed(channel, embed)
-        await channel.send(f"{interaction.user.mention}")
+        await self._scheduler.submit(
+            Route.MESSAGE,
+            channel.id,
+            channel.send(f"{interaction.user.mention}")
+        )
         await self.send_view(channel, HideButton())
         await interaction.edit_original_response(content="Ticket created")
     
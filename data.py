@@ -3,15 +3,25 @@
 The data file is a JSON file that stores mappings from
 games to the IDs of guild entities such as channels and roles,
 as well as other miscellaneous guild entity IDs that the bot
-requires to function properly.
+requires to function properly. The same data can instead be
+stored in an SQLite database by setting the DATA_BACKEND
+environment variable to 'sqlite'.
 """
 
-import json
+import os
 from enum import Enum
+from typing import Any
+
+from storage import JsonStorage, SqliteStorage
 
 DATA_FILE = 'data.json'
+DATA_DB = 'data.db'
 MISC_GAMES_CHANNEL_NAME = 'misc-games'
 
+# The environment variable that selects the storage backend
+# for the data, which is either 'json' (the default) or 'sqlite'.
+DATA_BACKEND_ENV = 'DATA_BACKEND'
+
 
 class _KEY(Enum):
     """Represents the keys in the data file."""
@@ -57,9 +67,21 @@ class Data(metaclass=Singleton):
         self.log_channel_id = None
         self.entity = None
 
-        # Load the data file as a dictionary.
-        with open(DATA_FILE, 'r') as file:
-            self._data = json.load(file)
+        # Lookup indexes over the entity mapping. These are kept
+        # up to date incrementally so that lookups made on the
+        # event path are constant time and never allocate.
+        self._role_ids = frozenset()
+        self._channel_ids = frozenset()
+        self._game_by_role_id = {}
+        self._game_by_channel_id = {}
+        self._channel_id_by_role_id = {}
+
+        # Open the storage backend and load the data as a dictionary.
+        if os.getenv(DATA_BACKEND_ENV, 'json').lower() == 'sqlite':
+            self._storage = SqliteStorage(DATA_DB)
+        else:
+            self._storage = JsonStorage(DATA_FILE)
+        self._data = self._storage.load()
 
         # Provide convenience attributes for all keys
         # in the data file so that data lookups don't
@@ -71,6 +93,45 @@ class Data(metaclass=Singleton):
                 value
             )
 
+        # Build the lookup indexes from the loaded entities.
+        for game, values in self.entity.items():
+            self._index_game(
+                game,
+                values[str(_KEY.ROLE)],
+                values[str(_KEY.CHANNEL)]
+            )
+
+    def _index_game(self, name: str, role_id: int, channel_id: int) -> None:
+        """Adds a game to the lookup indexes.
+
+        Args:
+            name: The name of the game in kebab case.
+            role_id: The ID of the role associated with the game.
+            channel_id: The ID of the channel associated with the game.
+        """
+
+        self._role_ids = self._role_ids | {role_id}
+        self._channel_ids = self._channel_ids | {channel_id}
+        self._game_by_role_id[role_id] = name
+        self._game_by_channel_id[channel_id] = name
+        self._channel_id_by_role_id[role_id] = channel_id
+
+    def _unindex_game(self, name: str) -> None:
+        """Removes a game from the lookup indexes.
+
+        Args:
+            name: The name of the game in kebab case.
+        """
+
+        role_id = self.entity[name][str(_KEY.ROLE)]
+        channel_id = self.entity[name][str(_KEY.CHANNEL)]
+
+        self._role_ids = self._role_ids - {role_id}
+        self._channel_ids = self._channel_ids - {channel_id}
+        self._game_by_role_id.pop(role_id, None)
+        self._game_by_channel_id.pop(channel_id, None)
+        self._channel_id_by_role_id.pop(role_id, None)
+
     def add_game(
         self,
         name: str,
@@ -85,15 +146,18 @@ class Data(metaclass=Singleton):
             channel_id: The ID of the channel associated with the game.
         """
 
-        # Update the dictionary representation of the data file.
+        # Update the dictionary representation of the data file
+        # and the lookup indexes, replacing any stale entry.
+        if name in self.entity:
+            self._unindex_game(name)
         self.entity[name] = {
             str(_KEY.ROLE): role_id,
             str(_KEY.CHANNEL): channel_id,
         }
+        self._index_game(name, role_id, channel_id)
 
-        # Write the updated dictionary to the data file.
-        with open(DATA_FILE, 'w') as file:
-            json.dump(self._data, file, indent=4)
+        # Persist the change.
+        self._storage.put_game(name, role_id, channel_id)
 
     def delete_game(self, name: str) -> None:
         """Deletes a game from the data file.
@@ -102,12 +166,62 @@ class Data(metaclass=Singleton):
             name: The name of the game in kebab case.
         """
 
-        # Update the dictionary representation of the data file.
+        # Update the lookup indexes and the dictionary
+        # representation of the data file.
+        self._unindex_game(name)
         del self.entity[name]
 
-        # Write the updated dictionary to the data file.
-        with open(DATA_FILE, 'w') as file:
-            json.dump(self._data, file, indent=4)
+        # Persist the change.
+        self._storage.delete_game(name)
+
+    async def flush(self) -> None:
+        """Writes any pending changes to storage immediately."""
+
+        await self._storage.flush()
+
+    def get_state(self, namespace: str, key: Any, default: Any = None) -> Any:
+        """Returns a value from the bot's persistent state.
+
+        The state holds data that the bot would otherwise need to
+        rediscover through the Discord API, grouped into namespaces.
+
+        Args:
+            namespace: The namespace the value belongs to.
+            key: The key of the value within the namespace.
+            default: The value to return if the key doesn't exist.
+        """
+
+        return self._storage.get_state(namespace, str(key), default)
+
+    def set_state(self, namespace: str, key: Any, value: Any) -> None:
+        """Sets a value in the bot's persistent state.
+
+        Args:
+            namespace: The namespace the value belongs to.
+            key: The key of the value within the namespace.
+            value: The value, which must be serialisable as JSON.
+        """
+
+        self._storage.set_state(namespace, str(key), value)
+
+    def delete_state(self, namespace: str, key: Any) -> None:
+        """Deletes a value from the bot's persistent state if it exists.
+
+        Args:
+            namespace: The namespace the value belongs to.
+            key: The key of the value within the namespace.
+        """
+
+        self._storage.delete_state(namespace, str(key))
+
+    def state(self, namespace: str) -> dict[str, Any]:
+        """Returns a copy of every value in a namespace of the state.
+
+        Args:
+            namespace: The namespace to get the values of.
+        """
+
+        return self._storage.state(namespace)
 
     def role_id(self, game: str) -> int:
         """Returns the role ID associated with a game.
@@ -127,29 +241,34 @@ class Data(metaclass=Singleton):
 
         return self.entity[game][str(_KEY.CHANNEL)]
 
-    def role_ids(self) -> list[int]:
+    def role_ids(self) -> frozenset[int]:
         """Returns all role IDs associated with a game."""
 
-        return [
-            values[str(_KEY.ROLE)]
-            for values in self.entity.values()
-        ]
+        return self._role_ids
 
-    def channel_ids(self) -> list[int]:
+    def channel_ids(self) -> frozenset[int]:
         """Returns all channel IDs associated with a game."""
 
-        return [
-            values[str(_KEY.CHANNEL)]
-            for values in self.entity.values()
-        ]
+        return self._channel_ids
 
-    def game(self, id_: int) -> str:
+    def game(self, id_: int) -> str | None:
         """Returns the name of a game in kebab case from a role or channel ID.
 
         Args:
             id_: The role or channel ID associated with a game.
         """
 
-        for game, values in self.entity.items():
-            if id_ in values.values():
-                return game
+        game = self._game_by_role_id.get(id_)
+        if game is None:
+            game = self._game_by_channel_id.get(id_)
+
+        return game
+
+    def game_channel_id(self, role_id: int) -> int | None:
+        """Returns the ID of the channel for the game with the given role.
+
+        Args:
+            role_id: The ID of the role associated with a game.
+        """
+
+        return self._channel_id_by_role_id.get(role_id)
@@ -0,0 +1,319 @@
+"""Provides a durable queue for long running bulk work.
+
+Bulk operations such as syncing a role with a game channel's threads
+are split into small jobs, like adding one member to one thread, which
+are recorded in an SQLite database before they run. A pool of workers
+drains the queue and retries jobs that fail. Jobs that haven't finished
+when the bot stops are resumed the next time it starts, so progress
+is never lost to a restart or disconnect.
+"""
+
+import json
+import random
+import asyncio
+import sqlite3
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterable
+from typing import NamedTuple
+
+from data import Singleton
+
+JOBS_DB = 'jobs.db'
+
+# The number of jobs that can run at once.
+_WORKERS = 4
+
+# The number of times a job is attempted before it is given up on.
+_MAX_ATTEMPTS = 5
+
+# The maximum number of seconds to wait for running
+# jobs to finish when the queue is stopped.
+_STOP_TIMEOUT = 10
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS job (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    chain TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0
+);
+'''
+
+
+class Job(NamedTuple):
+    """A unit of work in the queue.
+
+    Attributes:
+        id: The ID of the job.
+        kind: The kind of job, which determines the handler that runs it.
+        payload: The data the handler needs to run the job.
+        chain: The chain the job belongs to, if any. The jobs in a chain
+            run one at a time in the order they were added to the queue.
+        attempts: The number of times the job has been attempted.
+    """
+
+    id: int
+    kind: str
+    payload: dict
+    chain: str | None
+    attempts: int
+
+
+class JobQueue(metaclass=Singleton):
+    """A durable queue of jobs that is drained by a pool of workers.
+
+    Args:
+        path: The path of the SQLite database that stores the jobs.
+    """
+
+    def __init__(self, path: str = JOBS_DB) -> None:
+        self._connection = sqlite3.connect(path, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(_SCHEMA)
+
+        self._handlers = {}
+        self._queue = asyncio.Queue()
+        self._chains = {}
+        self._futures = {}
+        self._workers = []
+        self._running = set()
+        self._stopping = False
+
+    def register(
+        self,
+        kind: str,
+        handler: Callable[[dict], Awaitable[None]]
+    ) -> None:
+        """Registers the handler that runs a kind of job.
+
+        Args:
+            kind: The kind of job.
+            handler: A function that runs a job given its payload.
+        """
+
+        self._handlers[kind] = handler
+
+    def start(self, workers: int = _WORKERS) -> None:
+        """Starts the workers and resumes any unfinished jobs.
+
+        This does nothing if the queue has already been started.
+
+        Args:
+            workers: The number of jobs that can run at once.
+        """
+
+        if self._workers:
+            return
+
+        self._stopping = False
+        for id_, kind, payload, chain, attempts in self._connection.execute(
+            'SELECT id, kind, payload, chain, attempts '
+            'FROM job WHERE failed = 0 ORDER BY id'
+        ):
+            self._submit(Job(id_, kind, json.loads(payload), chain, attempts))
+
+        self._workers = [
+            asyncio.create_task(self._work()) for _ in range(workers)
+        ]
+
+    async def stop(self, timeout: float = _STOP_TIMEOUT) -> None:
+        """Stops the workers.
+
+        Running jobs are given some time to finish. Any jobs that
+        don't finish stay in the database and are resumed the next
+        time the queue is started.
+
+        Args:
+            timeout: The maximum number of seconds to wait
+                for running jobs to finish.
+        """
+
+        self._stopping = True
+        if self._running:
+            await asyncio.wait(self._running, timeout=timeout)
+
+        for task in (*self._running, *self._workers):
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+        self._workers = []
+        self._queue = asyncio.Queue()
+        self._chains.clear()
+
+    def enqueue(
+        self,
+        jobs: Iterable[tuple[str, dict] | tuple[str, dict, str | None]]
+    ) -> list[int]:
+        """Adds jobs to the queue.
+
+        Args:
+            jobs: The jobs to add as tuples of their kind, payload
+                and optionally the chain they belong to.
+
+        Returns:
+            The IDs of the added jobs in the same order.
+        """
+
+        ids = []
+        self._connection.execute('BEGIN')
+        try:
+            for kind, payload, *chain in jobs:
+                chain = chain[0] if chain else None
+                cursor = self._connection.execute(
+                    'INSERT INTO job (kind, payload, chain) VALUES (?, ?, ?)',
+                    (kind, json.dumps(payload), chain)
+                )
+                ids.append(cursor.lastrowid)
+                self._futures[cursor.lastrowid] = (
+                    asyncio.get_running_loop().create_future()
+                )
+                self._submit(Job(cursor.lastrowid, kind, payload, chain, 0))
+        except BaseException:
+            self._connection.execute('ROLLBACK')
+            raise
+        else:
+            self._connection.execute('COMMIT')
+
+        return ids
+
+    async def wait(
+        self,
+        ids: Iterable[int],
+        on_finish: Callable[[bool], None] | None = None
+    ) -> int:
+        """Waits for jobs added by enqueue to finish.
+
+        Args:
+            ids: The IDs of the jobs to wait for.
+            on_finish: A function that is called with whether
+                each job succeeded as soon as it finishes.
+
+        Returns:
+            The number of jobs that failed.
+        """
+
+        ids = list(ids)
+        if on_finish is not None:
+            def callback(future: asyncio.Future) -> None:
+                if not future.cancelled():
+                    on_finish(future.result())
+
+            for id_ in ids:
+                self._futures[id_].add_done_callback(callback)
+
+        try:
+            results = await asyncio.gather(
+                *(self._futures[id_] for id_ in ids)
+            )
+        finally:
+            for id_ in ids:
+                self._futures.pop(id_, None)
+
+        return results.count(False)
+
+    def pending(self) -> int:
+        """Returns the number of jobs that haven't finished yet."""
+
+        return self._connection.execute(
+            'SELECT COUNT(*) FROM job WHERE failed = 0'
+        ).fetchone()[0]
+
+    def _submit(self, job: Job) -> None:
+        """Makes a job available to the workers.
+
+        A job in a chain only becomes available once
+        the jobs before it in the chain have finished.
+
+        Args:
+            job: The job to submit.
+        """
+
+        if job.chain is None:
+            self._queue.put_nowait(job)
+        elif job.chain in self._chains:
+            self._chains[job.chain].append(job)
+        else:
+            self._chains[job.chain] = deque()
+            self._queue.put_nowait(job)
+
+    def _finish(self, job: Job, succeeded: bool) -> None:
+        """Records that a job has finished.
+
+        Args:
+            job: The job that finished.
+            succeeded: Whether the job succeeded.
+        """
+
+        if succeeded:
+            self._connection.execute('DELETE FROM job WHERE id = ?', (job.id,))
+        else:
+            self._connection.execute(
+                'UPDATE job SET failed = 1 WHERE id = ?',
+                (job.id,)
+            )
+
+        # Resolve the job's future if anything can wait for it. Jobs
+        # resumed from a previous run don't have a future.
+        future = self._futures.get(job.id)
+        if future is not None and not future.done():
+            future.set_result(succeeded)
+
+        # Make the next job in the chain available.
+        if job.chain is not None:
+            waiting = self._chains[job.chain]
+            if waiting:
+                self._queue.put_nowait(waiting.popleft())
+            else:
+                del self._chains[job.chain]
+
+    def _retry(self, job: Job) -> None:
+        """Schedules a failed job to be attempted again after a backoff.
+
+        Args:
+            job: The job to retry.
+        """
+
+        attempts = job.attempts + 1
+        self._connection.execute(
+            'UPDATE job SET attempts = ? WHERE id = ?',
+            (attempts, job.id)
+        )
+
+        delay = 2 ** attempts + random.random()
+        asyncio.get_running_loop().call_later(
+            delay,
+            self._queue.put_nowait,
+            job._replace(attempts=attempts)
+        )
+
+    async def _work(self) -> None:
+        """Runs jobs from the queue until the queue is stopped."""
+
+        while not self._stopping:
+            job = await self._queue.get()
+            if self._stopping:
+                break
+
+            handler = self._handlers.get(job.kind)
+            if handler is None:
+                print(f'No handler for job {job.id} of kind \'{job.kind}\'')
+                self._finish(job, False)
+                continue
+
+            task = asyncio.create_task(handler(job.payload))
+            self._running.add(task)
+            try:
+                await asyncio.shield(task)
+            except Exception as error:
+                if job.attempts + 1 < _MAX_ATTEMPTS:
+                    self._retry(job)
+                else:
+                    print(f'Job {job.id} of kind \'{job.kind}\' failed: {error}')
+                    self._finish(job, False)
+            else:
+                self._finish(job, True)
+            finally:
+                self._running.discard(task)
@@ -0,0 +1,194 @@
+"""Buffers the bot's log messages and sends them to the log channel.
+
+Sending a message to the log channel for every event means that a
+burst of events (such as many threads being deleted at once) uses up
+the rate limit of the channel. The sink here gathers log entries and
+sends them together as a single message after a short interval, or
+sooner if enough entries have built up. Every entry is also written to
+a local log file so that there is a record of it even if sending fails.
+"""
+
+import os
+import json
+import asyncio
+from datetime import datetime, timezone
+
+import discord
+
+from data import Singleton
+from scheduler import Priority, Route, Scheduler
+
+# The file that log entries are written to.
+LOG_FILE = 'log.jsonl'
+
+# The size in bytes that the log file can grow to before it is rotated,
+# and the number of rotated log files that are kept.
+_LOG_FILE_MAX_BYTES = 1_000_000
+_LOG_FILE_BACKUPS = 3
+
+# The number of seconds to gather log entries for before they
+# are sent, and the number of entries that are sent straight away.
+_LOG_FLUSH_INTERVAL = 10
+_LOG_FLUSH_SIZE = 20
+
+# The maximum number of characters in a message.
+_MAX_MESSAGE_LENGTH = 2000
+
+
+def _append(path: str, lines: list[str]) -> None:
+    """Appends lines to a log file, rotating it first if it's too large.
+
+    Args:
+        path: The path of the log file.
+        lines: The lines to append.
+    """
+
+    text = ''.join(f'{line}\n' for line in lines)
+    if (
+        os.path.exists(path)
+        and os.path.getsize(path) + len(text) > _LOG_FILE_MAX_BYTES
+    ):
+        # Shift each rotated file along by one, dropping the oldest.
+        for i in range(_LOG_FILE_BACKUPS - 1, 0, -1):
+            if os.path.exists(f'{path}.{i}'):
+                os.replace(f'{path}.{i}', f'{path}.{i + 1}')
+        os.replace(path, f'{path}.1')
+
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write(text)
+
+
+def _split_lines(lines: list[str]) -> list[str]:
+    """Joins lines into as few messages as possible.
+
+    Args:
+        lines: The lines to join.
+
+    Returns:
+        The contents of the messages, in order.
+    """
+
+    messages = []
+    for line in lines:
+        line = line[:_MAX_MESSAGE_LENGTH]
+        if (
+            messages
+            and len(messages[-1]) + 1 + len(line) <= _MAX_MESSAGE_LENGTH
+        ):
+            messages[-1] += f'\n{line}'
+        else:
+            messages.append(line)
+
+    return messages
+
+
+class LogSink(metaclass=Singleton):
+    """Gathers log entries and sends them to the log channel in batches.
+
+    Args:
+        path: The path of the file to write log entries to.
+    """
+
+    def __init__(self, path: str = LOG_FILE) -> None:
+        self._path = path
+        self._scheduler = Scheduler()
+        self._channel = None
+        self._entries = []
+        self._task = None
+        self._flush_now = asyncio.Event()
+        self._lock = asyncio.Lock()
+
+    def start(self, channel: discord.TextChannel) -> None:
+        """Starts sending log entries to a channel.
+
+        Entries logged before this is called are kept
+        and sent with the next batch.
+
+        Args:
+            channel: The channel to send log entries to.
+        """
+
+        self._channel = channel
+        if self._entries:
+            self._schedule()
+
+    def log(self, message: str) -> None:
+        """Adds an entry to the log.
+
+        Args:
+            message: The message to log.
+        """
+
+        self._entries.append((datetime.now(timezone.utc), message))
+        if len(self._entries) >= _LOG_FLUSH_SIZE:
+            self._flush_now.set()
+        self._schedule()
+
+    async def flush(self) -> None:
+        """Sends and writes all gathered log entries immediately."""
+
+        async with self._lock:
+            entries, self._entries = self._entries, []
+            if not entries:
+                return
+
+            # Write the entries to the log file in a thread executor
+            # to keep the event loop free while they are sent.
+            lines = [
+                json.dumps({'time': time.isoformat(), 'message': message})
+                for time, message in entries
+            ]
+            write = asyncio.get_running_loop().run_in_executor(
+                None,
+                _append,
+                self._path,
+                lines
+            )
+
+            try:
+                if self._channel is not None:
+                    for content in _split_lines([m for _, m in entries]):
+                        await self._scheduler.submit(
+                            Route.MESSAGE,
+                            self._channel.id,
+                            self._channel.send(content),
+                            Priority.BULK
+                        )
+            except discord.HTTPException:
+                # The entries are still kept in the log file.
+                pass
+            finally:
+                await write
+
+    async def stop(self) -> None:
+        """Sends and writes any log entries that are left."""
+
+        if self._task is not None and not self._task.done():
+            self._flush_now.set()
+            await self._task
+        await self.flush()
+
+    def _schedule(self) -> None:
+        """Starts sending gathered entries if it hasn't already started."""
+
+        if self._channel is None:
+            return
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        """Sends gathered entries in batches until there are none left."""
+
+        while self._entries:
+            # Wait for more entries unless enough have built up.
+            try:
+                await asyncio.wait_for(
+                    self._flush_now.wait(),
+                    _LOG_FLUSH_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+
+            self._flush_now.clear()
+            await self.flush()
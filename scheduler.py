@@ -0,0 +1,213 @@
+"""Schedules the bot's outbound requests to Discord.
+
+Every request that changes something in the guild, such as editing a
+message or adding a role to a member, goes through the scheduler. Each
+route (a kind of request for a particular channel or the guild) has a
+token bucket that keeps requests under Discord's rate limits. Waiting
+requests are granted in priority order, so requests made on behalf of
+a user who is waiting always go before those made by bulk operations.
+"""
+
+import time
+import heapq
+import asyncio
+import itertools
+from collections.abc import Awaitable, Hashable
+from enum import Enum, IntEnum
+from typing import Any, TypeVar
+
+from data import Singleton
+
+T = TypeVar('T')
+
+# The maximum number of bulk requests that can be in progress at once.
+_BULK_CONCURRENCY = 4
+
+
+class Priority(IntEnum):
+    """The priority of a request, where lower values go first."""
+
+    INTERACTIVE = 0
+    BULK = 1
+
+
+class Route(Enum):
+    """The kinds of request, which are each rate limited separately."""
+
+    MESSAGE = 1
+    CHANNEL = 2
+    ROLE = 3
+    MEMBER_ROLE = 4
+
+
+# The number of requests allowed per number of seconds for
+# each key of a route. These are conservative estimates of
+# Discord's limits, which aren't all documented.
+_RATE_LIMITS = {
+    Route.MESSAGE: (5, 5),
+    Route.CHANNEL: (5, 5),
+    Route.ROLE: (5, 5),
+    Route.MEMBER_ROLE: (5, 1),
+}
+
+
+class _Bucket:
+    """A token bucket and the requests waiting on it.
+
+    Args:
+        rate: The number of requests allowed per period.
+        per: The length of the period in seconds.
+    """
+
+    def __init__(self, rate: int, per: float) -> None:
+        self.rate = rate
+        self.per = per
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.waiters = []
+        self.timer = None
+
+    def refill(self) -> None:
+        """Adds the tokens earned since the bucket was last updated."""
+
+        now = time.monotonic()
+        self.tokens = min(
+            self.rate,
+            self.tokens + (now - self.updated) * self.rate / self.per
+        )
+        self.updated = now
+
+
+class Scheduler(metaclass=Singleton):
+    """Schedules requests within per-route rate limits by priority.
+
+    Args:
+        bulk_concurrency: The maximum number of bulk
+            requests that can be in progress at once.
+    """
+
+    def __init__(self, bulk_concurrency: int = _BULK_CONCURRENCY) -> None:
+        self._buckets = {}
+        self._sequence = itertools.count()
+        self._bulk_semaphore = asyncio.Semaphore(bulk_concurrency)
+        self._counters = {
+            'submitted': 0,
+            'throttled': 0,
+            'failed': 0,
+        }
+
+    async def submit(
+        self,
+        route: Route,
+        key: Hashable,
+        request: Awaitable[T],
+        priority: Priority = Priority.INTERACTIVE
+    ) -> T:
+        """Makes a request once its route allows it.
+
+        Args:
+            route: The kind of request.
+            key: The ID of the channel or guild the request is for.
+            request: The request to make, such as message.edit(...).
+            priority: The priority of the request.
+
+        Returns:
+            The result of the request.
+        """
+
+        self._counters['submitted'] += 1
+        try:
+            await self._acquire(route, key, priority)
+            if priority == Priority.BULK:
+                async with self._bulk_semaphore:
+                    return await request
+
+            return await request
+        except Exception:
+            self._counters['failed'] += 1
+            raise
+        finally:
+            # Close the request in case it was never awaited.
+            if asyncio.iscoroutine(request):
+                request.close()
+
+    def counters(self) -> dict[str, Any]:
+        """Returns counters that describe the scheduler's activity.
+
+        Returns:
+            The total number of requests submitted, throttled (made to
+            wait for their route) and failed, and the number of requests
+            currently queued for each priority.
+        """
+
+        queued = {priority.name.lower(): 0 for priority in Priority}
+        for bucket in self._buckets.values():
+            for priority, _, future in bucket.waiters:
+                if not future.done():
+                    queued[Priority(priority).name.lower()] += 1
+
+        return {**self._counters, 'queued': queued}
+
+    async def _acquire(
+        self,
+        route: Route,
+        key: Hashable,
+        priority: Priority
+    ) -> None:
+        """Waits for a token from a route's bucket.
+
+        Args:
+            route: The kind of request.
+            key: The ID of the channel or guild the request is for.
+            priority: The priority of the request.
+        """
+
+        bucket = self._buckets.get((route, key))
+        if bucket is None:
+            bucket = _Bucket(*_RATE_LIMITS[route])
+            self._buckets[(route, key)] = bucket
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            bucket.waiters,
+            (priority, next(self._sequence), future)
+        )
+        self._dispatch(bucket)
+
+        if not future.done():
+            self._counters['throttled'] += 1
+
+        await future
+
+    def _dispatch(self, bucket: _Bucket) -> None:
+        """Grants tokens to the waiting requests in priority order.
+
+        If the bucket runs out of tokens, then this
+        runs again once the next token is available.
+
+        Args:
+            bucket: The bucket to grant tokens from.
+        """
+
+        if bucket.timer is not None:
+            bucket.timer.cancel()
+            bucket.timer = None
+
+        while bucket.waiters:
+            bucket.refill()
+            if bucket.tokens < 1:
+                delay = (1 - bucket.tokens) * bucket.per / bucket.rate
+                bucket.timer = asyncio.get_running_loop().call_later(
+                    delay,
+                    self._dispatch,
+                    bucket
+                )
+                return
+
+            # Skip requests that were cancelled while waiting.
+            _, _, future = heapq.heappop(bucket.waiters)
+            if future.done():
+                continue
+
+            bucket.tokens -= 1
+            future.set_result(None)
@@ -0,0 +1,454 @@
+"""Provides the storage backends for the bot's persistent data.
+
+The data consists of miscellaneous settings (such as category and
+channel IDs), the game entities that map games to their roles and
+channels, and namespaced state that the bot would otherwise have to
+rediscover through the Discord API. Two interchangeable backends are
+provided, a JSON file and an SQLite database. Running this module
+imports an existing JSON data file into an SQLite database.
+"""
+
+import os
+import copy
+import json
+import asyncio
+import sqlite3
+import argparse
+import tempfile
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+# The number of seconds to wait for further changes to the
+# data before it is written to the data file, so that bursts
+# of changes result in a single write.
+_WRITE_DELAY = 2
+
+# The keys in a JSON data file that don't hold settings.
+_ENTITY_KEY = 'entity'
+_STATE_KEY = 'state'
+
+# The schema of the SQLite database. Games are looked up by role
+# and channel ID as well as by name, so both of those are indexed.
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS setting (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS game (
+    name TEXT PRIMARY KEY,
+    role_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS game_role_id ON game (role_id);
+CREATE INDEX IF NOT EXISTS game_channel_id ON game (channel_id);
+CREATE TABLE IF NOT EXISTS state (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+'''
+
+
+class _WriteBehind:
+    """Writes a JSON document to a file atomically and in batches.
+
+    Changes are grouped over a short delay so that a burst of changes
+    causes a single write. The document is serialised in a thread
+    executor to keep the event loop free, and is written to a temporary
+    file that is synced to disk and then renamed over the original file,
+    so a crash mid-write never leaves a corrupted file behind.
+
+    Args:
+        path: The path of the file to write to.
+        snapshot: A function that returns the current document.
+        delay: The number of seconds to wait for further changes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        snapshot: Callable[[], dict],
+        delay: float = _WRITE_DELAY
+    ) -> None:
+        self._path = path
+        self._snapshot = snapshot
+        self._delay = delay
+        self._dirty = False
+        self._task = None
+        self._flush_now = asyncio.Event()
+
+    def schedule(self) -> None:
+        """Schedules a write of the document.
+
+        If there is no running event loop, then
+        the document is written immediately.
+        """
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(self._snapshot())
+            return
+
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+
+    async def flush(self) -> None:
+        """Writes any scheduled changes immediately."""
+
+        if self._task is not None and not self._task.done():
+            self._flush_now.set()
+            await self._task
+
+            # The task may have finished before it saw the request,
+            # so make sure the next write isn't made without a delay.
+            self._flush_now.clear()
+
+    async def _run(self) -> None:
+        """Writes the document until there are no more changes."""
+
+        loop = asyncio.get_running_loop()
+        while self._dirty:
+            # Wait for further changes unless a flush was requested.
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), self._delay)
+            except asyncio.TimeoutError:
+                pass
+
+            self._flush_now.clear()
+            self._dirty = False
+
+            # Take a copy of the document so that it can't be
+            # changed by the event loop while it is being written.
+            document = copy.deepcopy(self._snapshot())
+            try:
+                await loop.run_in_executor(None, self._write, document)
+            except OSError as error:
+                # Try again after the next delay.
+                self._dirty = True
+                print(f'Failed to write \'{self._path}\': {error}')
+
+    def _write(self, document: dict) -> None:
+        """Atomically writes a document to the file.
+
+        Args:
+            document: The document to write.
+        """
+
+        text = json.dumps(document, indent=4)
+        directory = os.path.dirname(os.path.abspath(self._path))
+
+        # Write to a temporary file in the same directory and sync it
+        # to disk, then rename it over the original file.
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as file:
+                file.write(text)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self._path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+class JsonStorage:
+    """Stores the data in a JSON file.
+
+    The whole file is kept in memory and changes to it
+    are written back in batches by a _WriteBehind.
+
+    Args:
+        path: The path of the JSON data file.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, 'r') as file:
+            self._document = json.load(file)
+
+        self._document.setdefault(_ENTITY_KEY, {})
+        self._writer = _WriteBehind(path, lambda: self._document)
+
+    def load(self) -> dict:
+        """Returns a copy of the settings and game entities."""
+
+        return {
+            key: copy.deepcopy(value)
+            for key, value in self._document.items()
+            if key != _STATE_KEY
+        }
+
+    def namespaces(self) -> list[str]:
+        """Returns the names of all namespaces in the state."""
+
+        return list(self._document.get(_STATE_KEY, {}))
+
+    def put_game(self, name: str, role_id: int, channel_id: int) -> None:
+        """Adds or replaces a game.
+
+        Args:
+            name: The name of the game in kebab case.
+            role_id: The ID of the role associated with the game.
+            channel_id: The ID of the channel associated with the game.
+        """
+
+        self._document[_ENTITY_KEY][name] = {
+            'role': role_id,
+            'channel': channel_id,
+        }
+        self._writer.schedule()
+
+    def delete_game(self, name: str) -> None:
+        """Deletes a game if it exists.
+
+        Args:
+            name: The name of the game in kebab case.
+        """
+
+        if self._document[_ENTITY_KEY].pop(name, None) is not None:
+            self._writer.schedule()
+
+    def get_state(self, namespace: str, key: str, default: Any) -> Any:
+        """Returns a value from the state.
+
+        Args:
+            namespace: The namespace the value belongs to.
+            key: The key of the value within the namespace.
+            default: The value to return if the key doesn't exist.
+        """
+
+        return (
+            self._document
+            .get(_STATE_KEY, {})
+            .get(namespace, {})
+            .get(key, default)
+        )
+
+    def set_state(self, namespace: str, key: str, value: Any) -> None:
+        """Sets a value in the state.
+
+        Args:
+            namespace: The namespace the value belongs to.
+            key: The key of the value within the namespace.
+            value: The value, which must be serialisable as JSON.
+        """
+
+        state = self._document.setdefault(_STATE_KEY, {})
+        state.setdefault(namespace, {})[key] = value
+        self._writer.schedule()
+
+    def delete_state(self, namespace: str, key: str) -> None:
+        """Deletes a value from the state if it exists.
+
+        Args:
+            namespace: The namespace the value belongs to.
+            key: The key of the value within the namespace.
+        """
+
+        values = self._document.get(_STATE_KEY, {}).get(namespace, {})
+        if values.pop(key, None) is not None:
+            self._writer.schedule()
+
+    def state(self, namespace: str) -> dict[str, Any]:
+        """Returns a copy of every value in a namespace of the state.
+
+        Args:
+            namespace: The namespace to get the values of.
+        """
+
+        return copy.deepcopy(
+            self._document.get(_STATE_KEY, {}).get(namespace, {})
+        )
+
+    async def flush(self) -> None:
+        """Writes any pending changes to the file immediately."""
+
+        await self._writer.flush()
+
+
+class SqliteStorage:
+    """Stores the data in an SQLite database.
+
+    The database runs in WAL mode and every change is a single
+    row update, so the cost of a write doesn't grow with the
+    amount of data stored.
+
+    Args:
+        path: The path of the SQLite database file.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._connection = sqlite3.connect(path, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(_SCHEMA)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Groups the changes made inside the context into one transaction."""
+
+        self._connection.execute('BEGIN')
+        try:
+            yield
+        except BaseException:
+            self._connection.execute('ROLLBACK')
+            raise
+        else:
+            self._connection.execute('COMMIT')
+
+    def load(self) -> dict:
+        """Returns the settings and game entities."""
+
+        data = {
+            key: json.loads(value)
+            for key, value in self._connection.execute(
+                'SELECT key, value FROM setting'
+            )
+        }
+        data[_ENTITY_KEY] = {
+            name: {'role': role_id, 'channel': channel_id}
+            for name, role_id, channel_id in self._connection.execute(
+                'SELECT name, role_id, channel_id FROM game'
+            )
+        }
+
+        return data
+
+    def put_setting(self, key: str, value: Any) -> None:
+        """Adds or replaces a setting.
+
+        Args:
+            key: The key of the setting.
+            value: The value, which must be serialisable as JSON.
+        """
+
+        self._connection.execute(
+            'INSERT OR REPLACE INTO setting (key, value) VALUES (?, ?)',
+            (key, json.dumps(value))
+        )
+
+    def put_game(self, name: str, role_id: int, channel_id: int) -> None:
+        """Adds or replaces a game.
+
+        Args:
+            name: The name of the game in kebab case.
+            role_id: The ID of the role associated with the game.
+            channel_id: The ID of the channel associated with the game.
+        """
+
+        self._connection.execute(
+            'INSERT OR REPLACE INTO game (name, role_id, channel_id) '
+            'VALUES (?, ?, ?)',
+            (name, role_id, channel_id)
+        )
+
+    def delete_game(self, name: str) -> None:
+        """Deletes a game if it exists.
+
+        Args:
+            name: The name of the game in kebab case.
+        """
+
+        self._connection.execute('DELETE FROM game WHERE name = ?', (name,))
+
+    def get_state(self, namespace: str, key: str, default: Any) -> Any:
+        """Returns a value from the state.
+
+        Args:
+            namespace: The namespace the value belongs to.
+            key: The key of the value within the namespace.
+            default: The value to return if the key doesn't exist.
+        """
+
+        row = self._connection.execute(
+            'SELECT value FROM state WHERE namespace = ? AND key = ?',
+            (namespace, key)
+        ).fetchone()
+
+        return default if row is None else json.loads(row[0])
+
+    def set_state(self, namespace: str, key: str, value: Any) -> None:
+        """Sets a value in the state.
+
+        Args:
+            namespace: The namespace the value belongs to.
+            key: The key of the value within the namespace.
+            value: The value, which must be serialisable as JSON.
+        """
+
+        self._connection.execute(
+            'INSERT OR REPLACE INTO state (namespace, key, value) '
+            'VALUES (?, ?, ?)',
+            (namespace, key, json.dumps(value))
+        )
+
+    def delete_state(self, namespace: str, key: str) -> None:
+        """Deletes a value from the state if it exists.
+
+        Args:
+            namespace: The namespace the value belongs to.
+            key: The key of the value within the namespace.
+        """
+
+        self._connection.execute(
+            'DELETE FROM state WHERE namespace = ? AND key = ?',
+            (namespace, key)
+        )
+
+    def state(self, namespace: str) -> dict[str, Any]:
+        """Returns every value in a namespace of the state.
+
+        Args:
+            namespace: The namespace to get the values of.
+        """
+
+        return {
+            key: json.loads(value)
+            for key, value in self._connection.execute(
+                'SELECT key, value FROM state WHERE namespace = ?',
+                (namespace,)
+            )
+        }
+
+    async def flush(self) -> None:
+        """Does nothing, since every change is written immediately."""
+
+
+def import_json(json_path: str, db_path: str) -> None:
+    """Imports a JSON data file into an SQLite database.
+
+    Existing rows in the database with the same keys are replaced.
+
+    Args:
+        json_path: The path of the JSON data file to import.
+        db_path: The path of the SQLite database to import into.
+    """
+
+    source = JsonStorage(json_path)
+    target = SqliteStorage(db_path)
+    with target.transaction():
+        for key, value in source.load().items():
+            if key == _ENTITY_KEY:
+                for name, values in value.items():
+                    target.put_game(name, values['role'], values['channel'])
+            else:
+                target.put_setting(key, value)
+
+        for namespace in source.namespaces():
+            for key, value in source.state(namespace).items():
+                target.set_state(namespace, key, value)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Imports a JSON data file into an SQLite database.'
+    )
+    parser.add_argument('json_path', nargs='?', default='data.json')
+    parser.add_argument('db_path', nargs='?', default='data.db')
+    args = parser.parse_args()
+
+    import_json(args.json_path, args.db_path)
+    print(f'Imported \'{args.json_path}\' into \'{args.db_path}\'.')
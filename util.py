@@ -1,24 +1,45 @@
 """Contains functions that are useful throughout the program."""
 
-import discord
+import csv
+import codecs
+from collections.abc import AsyncIterator
 
-from discord import Message
+import aiohttp
 
 
-async def get_nth_msg(
-    channel: discord.TextChannel | discord.Thread,
-    n: int
-) -> Message:
-    """Get the nth message in a text channel or thread.
+def _parse_row(record: str) -> list[str]:
+    """Parses a single row of a CSV file.
 
     Args:
-        channel: The text channel or thread.
-        n: The nth message to get.
+        record: The text of the row, which may span many lines.
     """
 
-    return [
-        msg async for msg in channel.history(
-            limit=n,
-            oldest_first=True
-        )
-    ][n - 1]
+    return next(csv.reader(record.splitlines(keepends=True)), [])
+
+
+async def stream_csv(url: str) -> AsyncIterator[list[str]]:
+    """Downloads a UTF-8 CSV file and yields its rows as they arrive.
+
+    The file is downloaded and parsed a line at a
+    time, so the event loop is never blocked.
+
+    Args:
+        url: The URL of the CSV file.
+    """
+
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    record = ''
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url, raise_for_status=True) as response:
+            async for line in response.content:
+                record += decoder.decode(line)
+
+                # A quoted value can contain a line break, so a row is
+                # only complete once all of its quotes have been closed.
+                if record.count('"') % 2 == 0:
+                    yield _parse_row(record)
+                    record = ''
+
+    record += decoder.decode(b'', final=True)
+    if record:
+        yield _parse_row(record)